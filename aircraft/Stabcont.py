@@ -1,19 +1,37 @@
-import matplotlib.pyplot as plt
 import numpy as np
-from helpers import load_data
+from atmosphere import mach
+from helpers import get_logger, load_parameters, memoized, pyplot
 from loading import Loading
 
+logger = get_logger('stabcont')
+
+# Inputs in Stabcont.data each derived coefficient depends on (directly or through the coefficients it uses)
+MACH_KEYS = ('mach_cr', 'mach_l')
+CLAW_KEYS = ('A', 'quart_sweep', 'taper') + MACH_KEYS
+CLAH_KEYS = ('A_h', 'quart_sweep_h', 'taper_h') + MACH_KEYS
+CLAMINH_KEYS = ('b_f', 'b', 'S', 'c_r') + CLAW_KEYS
+XAC_KEYS = ('mac', 'h_f', 'l_fn', 'l_n', 'b_n') + CLAMINH_KEYS
+DOWNWASH_KEYS = ('b', 'l_h', 'z_h') + CLAW_KEYS
+CMAC_KEYS = ('l_f', 'h_f', 'S_hld', 'mac', 'cm0', 'cmacf') + CLAMINH_KEYS
+
 
 class Stabcont:
-    def __init__(self, file_name = "data.csv"):
-        self.data=load_data(file_name)
+    cm0 = -0.0078  # From Boeing 737 midwing airfoil, data['cm0'] overrides it
+    cmacf = -0.55  # Taken from graph, Boeing 737, comparable flap area ratio, data['cmacf'] overrides it
+
+    def __init__(self, file_name = "data.csv", data=None):
+        """Stability and control of the aircraft
+
+        args:
+            file_name (str): csv file with the aircraft data
+            data (dict): optional pre-loaded data; values may be NumPy arrays to evaluate many designs at once
+        """
+        self.params=load_parameters(file_name) if data is None else None  # Read-only, shared with every other user of the file
+        self.data=dict(self.params.items() if data is None else data)  # Own copy, the derived Mach numbers and root chord are added
         self.file_name = file_name
-        T=288.15-0.3048*self.data['h_cruise']*6.5/1000
-        a=np.sqrt(1.4*T*287)
-        m=self.data['v_max']*0.514444/a
-        self.data['mach_cr']=m
+        self.data['mach_cr']=mach(self.data['v_max'],self.data['h_cruise'])
 
-        self.data['mach_l']=self.data['v_app']*0.514444/np.sqrt(1.4*288.15*287)
+        self.data['mach_l']=mach(self.data['v_app'],0)
 
         c_r=2*self.data['S']/self.data['b']/(1+self.data['taper'])
 
@@ -25,6 +43,11 @@ class Stabcont:
         hsweep=np.rad2deg(np.arctan(thsweep))
         return hsweep
 
+    def clear_cache(self):
+        """Drops every memoized coefficient"""
+        self.__dict__.pop('_cache', None)
+
+    @memoized(*CLAW_KEYS)
     def getCLaw(self,fc):
         A=self.data['A']
         L_quart=self.data['quart_sweep']
@@ -38,11 +61,12 @@ class Stabcont:
 
         if fc=='cruise':
             Claw=(2*np.pi*A)/(2+np.sqrt(4+(A*beta_cr/0.95)**2*(1+np.tan(np.deg2rad(L_half))**2/beta_cr**2)))
-            print('CLaw', Claw)
+            logger.debug('CLaw %s', Claw)
         if fc=='land':
             Claw = (2 * np.pi * A) / (2 + np.sqrt(
                 4 + (A * beta_l / 0.95) ** 2 * (1 + np.tan(np.deg2rad(L_half)) ** 2 / beta_l ** 2)))
         return Claw
+    @memoized(*CLAH_KEYS)
     def getCLah(self,fc):
         A_h=self.data['A_h']
         L_h_quart=self.data['quart_sweep_h']
@@ -55,11 +79,12 @@ class Stabcont:
 
         if fc=='cruise':
             Clah=(2*np.pi*A_h)/(2+np.sqrt(4+(A_h*beta_cr/0.95)**2*(1+np.tan(np.deg2rad(L_h_half))**2/beta_cr**2)))
-            print('Clah',Clah)
+            logger.debug('Clah %s', Clah)
         if fc=='land':
             Clah = (2 * np.pi * A_h) / (2 + np.sqrt(
                 4 + (A_h * beta_l / 0.95) ** 2 * (1 + np.tan(np.deg2rad(L_h_half)) ** 2 / beta_l ** 2)))
         return Clah
+    @memoized(*CLAMINH_KEYS)
     def getCLaminh(self,fc):
         b_f=self.data['b_f']
         b=self.data['b']
@@ -71,13 +96,12 @@ class Stabcont:
         S_net=S - 2*(b_f/2*(c_r+c_fus)/2)
 
         CLaminh=CL_aw*(1+2.15*b_f/b)*S_net/S+np.pi/2*b_f**2/S
-        print('times',(1 + 2.15 * b_f / b) * S_net / S)
-        print('plus',np.pi / 2 * b_f ** 2 / S)
-        print('CL_a-h',CLaminh)
+        logger.debug('CL_a-h %s times %s plus %s', CLaminh, (1 + 2.15 * b_f / b) * S_net / S, np.pi / 2 * b_f ** 2 / S)
 
         return CLaminh
 
 
+    @memoized(*XAC_KEYS)
     def getx_ac(self,fc):
         m_cr=self.data['mach_cr']
         m_land=self.data['mach_l']
@@ -103,27 +127,25 @@ class Stabcont:
         if fc=='cruise':
             beta=np.sqrt(1-m_cr**2)
             lb=np.rad2deg(np.arctan(np.tan(np.deg2rad(L_quart))/beta))
-            print(beta*A,lb,taper)
+            logger.debug('beta*A %s sweep_beta %s taper %s', beta*A, lb, taper)
             xac_w = 0.265  # visually determined from graph
         if fc=='land':
             beta=np.sqrt(1-m_land**2)
             lb=np.rad2deg(np.arctan(np.tan(np.deg2rad(L_quart))/beta))
-            print(beta*A,lb,taper)
+            logger.debug('beta*A %s sweep_beta %s taper %s', beta*A, lb, taper)
             xac_w = 0.26  # visually determined from graph
 
 
         xacf_1=1.8/CLaminh*b_f*h_f*l_fn/S/mac
-        print('xacf1=',xacf_1)
         xacf_2=0.273/(1+taper)*b_f*c_g*(b-b_f)/mac**2/(b+2.15*b_f)*np.tan(np.deg2rad(L_quart))
-        print('xacf2=', xacf_2)
         #x_ac nacelles
         xac_n=4*-4*b_n**2*l_n/(S*mac*CLaminh)
-        print('xac_n=', xac_n)
 
         x_ac=xac_w-xacf_1+xacf_2+xac_n
-        print('xac=', x_ac)
+        logger.debug('xac %s xacf1 %s xacf2 %s xac_n %s', x_ac, xacf_1, xacf_2, xac_n)
 
         return x_ac
+    @memoized(*DOWNWASH_KEYS)
     def getdownwash(self):
         b=self.data['b']
         A=self.data['A']
@@ -142,9 +164,10 @@ class Stabcont:
         term3=1-np.sqrt(mtv**2/(1+mtv**2))
 
         deda=KeL/Ke0*(term1+term2*term3)*CL_aw/np.pi/A
-        print('1-deda=', deda)
+        logger.debug('deda %s', deda)
         return deda
-    def stabline(self,xcg):
+    def stabcoeffs(self,sm=0.05):
+        """Returns slope and intercepts (neutral, with static margin) of the stability line S_h/S(x_cg)"""
         CL_ah=self.getCLah('cruise')
         CL_aminh=self.getCLaminh('cruise')
         x_ac=self.getx_ac('cruise')
@@ -152,14 +175,19 @@ class Stabcont:
         l_h=self.data['l_h']
         mac=self.data['mac']
 
-        sratio = 1 / (CL_ah / CL_aminh * (1 - deda) * l_h / mac * 1) * xcg - (x_ac) / (
-                    CL_ah / CL_aminh * (1 - deda) * l_h / mac * 1)
+        k=CL_ah/CL_aminh*(1-deda)*l_h/mac*1
+        return 1/k, -x_ac/k, -(x_ac-sm)/k
 
-        sratio_sm=1/(CL_ah/CL_aminh*(1-deda)*l_h/mac*1)*xcg - (x_ac-0.05)/(CL_ah/CL_aminh*(1-deda)*l_h/mac*1)
+    def stabline(self,xcg):
+        slope, intercept, intercept_sm = self.stabcoeffs()
+
+        sratio = slope*xcg + intercept
+        sratio_sm = slope*xcg + intercept_sm
 
         return sratio, sratio_sm
 
 
+    @memoized(*CMAC_KEYS)
     def getcmac(self):
         A=self.data['A']
         L_quart=self.data['quart_sweep']
@@ -172,19 +200,20 @@ class Stabcont:
         CLaminh=self.getCLaminh('land')
 
 
-        cm0=-0.0078 #From Boeing 737 midwing airfoil
+        cm0=self.data.get('cm0', self.cm0)
         CLa=CLaminh*(S+S_hld)/S
         alpha_0L= -12.65*np.pi/180
         CL0=-CLa*alpha_0L
 
         cmac_w=cm0*(A*np.cos(np.deg2rad(L_quart))**2/(A+2*np.cos(np.deg2rad(L_quart))))
-        cmacf=-0.55 #Taken from graph, Boeing 737, comparable flap area ratio
+        cmacf=self.data.get('cmacf', self.cmacf)
         cmacfus=-1.8*(1-2.5*b_f/l_f)*np.pi*b_f*h_f*l_f/(4*S*mac)*CL0/CLaminh
 
         cmac=cmac_w+cmacf+cmacfus
         return cmac
     
-    def contline(self,xcg):
+    def contcoeffs(self):
+        """Returns slope and intercept of the control line S_h/S(x_cg)"""
         CL_max=self.data['CL_max']
         l_h=self.data['l_h']
         mac=self.data['mac']
@@ -192,38 +221,100 @@ class Stabcont:
         Cm_ac=self.getcmac()
         CL_h=-0.8
 
-        sratio=1/(CL_h/CL_max*l_h/mac*1)*xcg+(Cm_ac/CL_max-xac)/(CL_h/CL_max*l_h/mac*1)
+        k=CL_h/CL_max*l_h/mac*1
+        return 1/k, (Cm_ac/CL_max-xac)/k
+
+    def contline(self,xcg):
+        slope, intercept = self.contcoeffs()
+
+        sratio=slope*xcg+intercept
 
         return sratio
 
-    def scissorplot(self):
-        load = Loading(file_name = self.file_name, mac = 3.17, change = 0.6)
+    def get_cg_range(self, mac=3.17, change=0.6):
+        """Returns the minimum and maximum x_cg/mac of the loading diagram of the aircraft data
+
+        The loading diagram is drawn for a single design; for data holding arrays of designs, pass the cg range to
+        required_tail and scissor_lines, see sensitivity.loading_range.
+        """
+        if self.params is None and any(np.ndim(value) for value in self.data.values()):
+            raise ValueError("The loading diagram needs a single design, pass min_xcg and max_xcg for arrays of "
+                             "designs")
+        load = Loading(file_name = self.file_name, mac = mac, change = change,
+                       data = None if self.params is not None else self.data)
         load.get_cg_shift(plot=False)
-        max_xcg, min_xcg = load.get_maxmincg()
-        
-        print("Check Cg positions", min_xcg, max_xcg)
-        
-        S=self.data['S']
-        S_h=self.data['S_h']
-
-        sratio=S_h/S
-        print("Here:", sratio)
-
-        xcgrange=np.arange(0,1,0.05)
-        stabrange=self.stabline(xcgrange)
-        contrange=self.contline(xcgrange)
-
-        plt.vlines(min_xcg,0,0.4,color='black')
-        plt.vlines(max_xcg,0,0.4,color='black')
-        #plt.hlines(0.202,0,0.4,color='red')
-        plt.plot(xcgrange,stabrange[0])
-        plt.plot(xcgrange,stabrange[1],label='S.M.')
-        plt.plot(xcgrange, contrange)
-        plt.xlabel(r'$\frac{x_{cg}}{mac}$',fontsize=22)
-        plt.ylabel(r'$\frac{S_h}{S}$',fontsize=22)
-        plt.ylim((0))
-        plt.legend()
-        plt.grid()
+        return load.get_maxmincg()
+
+    def required_tail(self, min_xcg=None, max_xcg=None, sm=0.05):
+        """Returns the minimum S_h/S for which the cg range is both stable and controllable
+
+        Both scissor lines are linear in x_cg, with the stability line rising and the control line falling, so the
+        requirement is set by the stability line at the aft cg and the control line at the forward cg. Works on
+        single designs and on data holding arrays of designs.
+
+        args:
+            min_xcg, max_xcg (float or array): cg range as x_cg/mac, taken from the loading diagram if omitted
+            sm (float): static margin applied to the stability line
+
+        returns:
+            dict: 'sratio_req' required S_h/S, 'stab_req' and 'cont_req' for each constraint, 'limit' with the active
+            constraint ('stability' or 'control') and 'margin' between the current S_h/S and the requirement
+        """
+        if min_xcg is None or max_xcg is None:
+            min_xcg, max_xcg = self.get_cg_range()
+
+        slope_s, _, intercept_sm = self.stabcoeffs(sm)
+        slope_c, intercept_c = self.contcoeffs()
+
+        stab_req = slope_s*max_xcg + intercept_sm
+        cont_req = slope_c*min_xcg + intercept_c
+        sratio_req = np.maximum(stab_req, cont_req)
+        limit = np.where(stab_req >= cont_req, 'stability', 'control')
+
+        return {
+            'sratio_req': sratio_req,
+            'stab_req': stab_req,
+            'cont_req': cont_req,
+            'limit': str(limit) if limit.ndim == 0 else limit,
+            'margin': self.data['S_h']/self.data['S'] - sratio_req,
+        }
+
+    def scissor_lines(self, min_xcg=None, max_xcg=None, xcg=None):
+        """Returns the lines of the scissor plot
+
+        args:
+            min_xcg, max_xcg (float): cg range as x_cg/mac, taken from the loading diagram if omitted
+            xcg (array): x_cg/mac values where the lines are evaluated, 0 to 0.95 by default
+
+        returns:
+            dict: 'xcg', the 'stab', 'stab_sm' and 'cont' lines, the 'min_xcg' and 'max_xcg' range and the current
+            'sratio'
+        """
+        if min_xcg is None or max_xcg is None:
+            min_xcg, max_xcg = self.get_cg_range()
+        xcg = np.arange(0, 1, 0.05) if xcg is None else xcg
+
+        stab, stab_sm = self.stabline(xcg)
+        return {
+            'xcg': xcg,
+            'stab': stab,
+            'stab_sm': stab_sm,
+            'cont': self.contline(xcg),
+            'min_xcg': min_xcg,
+            'max_xcg': max_xcg,
+            'sratio': self.data['S_h'] / self.data['S'],
+        }
+
+    def scissorplot(self):
+        from plots import ScissorPlot
+
+        lines = self.scissor_lines()
+
+        print("Check Cg positions", lines['min_xcg'], lines['max_xcg'])
+        print("Here:", lines['sratio'])
+
+        plt = pyplot()
+        ScissorPlot(plt.figure()).update(lines)
         plt.show()
 
 
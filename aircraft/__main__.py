@@ -0,0 +1,202 @@
+"""Command line entry point: c.g., loading diagram and tail requirement of an aircraft, once or for streams of records
+
+Without --batch the results of the data file are printed as one JSON line, and --plot saves the loading diagram or
+scissor plot to a file instead of showing it. With --batch, records are read as JSON lines from stdin and one result
+line per record is written to stdout, in order. Records are gathered in micro-batches of --batch-size and every batch
+is evaluated in one vectorized pass, with the models built once per run.
+
+    cg, scissor     design records, the parameters replacing those of the data file: {"id": 7, "A": 9.5, "S_h": 14}
+    loading         manifest records, items as in manifests.py: {"id": 7, "items": [{"kind": "pax", "location": "12C"},
+                                                                               {"kind": "cargo", "location": "aft",
+                                                                                "mass": 850}]}
+
+An "id" is copied to the result. A record that cannot be evaluated is answered with its "error" and the stream goes on.
+
+    python -m aircraft scissor --data NewData.csv --mac 3.17 --change 0.6 --plot scissor.png
+    python -m aircraft cg --batch < designs.jsonl > results.jsonl
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)  # The modules of the package import each other by their flat names
+
+import numpy as np  # noqa: E402
+
+from cg_calculation import CenterOfGravity  # noqa: E402
+from helpers import load_data  # noqa: E402
+from loading import Loading  # noqa: E402
+from manifests import ManifestModel  # noqa: E402
+from parameters import validate  # noqa: E402
+from sensitivity import loading_range  # noqa: E402
+from Stabcont import Stabcont  # noqa: E402
+
+COMMANDS = ['cg', 'loading', 'scissor']
+TAIL = ['sratio_req', 'stab_req', 'cont_req', 'limit', 'margin']
+
+
+def design_data(records, base):
+    """Returns the data of the design records as 1d arrays, the parameters of base replaced by those of each record"""
+    n = len(records)
+    data = {key: np.full(n, value) for key, value in base.items()}
+    for i, record in enumerate(records):
+        for key, value in record.items():
+            if key == 'id':
+                continue
+            if key not in data:
+                raise KeyError(f"Unknown parameter '{key}'")
+            data[key][i] = value
+    validate(data, 'record')
+    return data
+
+
+def columns_to_records(results, n):
+    """Returns the columns of results, arrays of length n, as n dictionaries"""
+    names = list(results)
+    columns = [np.broadcast_to(results[name], n).tolist() for name in names]
+    return [dict(zip(names, values)) for values in zip(*columns)]
+
+
+class Evaluator:
+    """Results of one kind of record for the aircraft of a data file, the models built once"""
+
+    def __init__(self, command, file_name, mac=1, change=0):
+        self.command = command
+        self.file_name = file_name
+        self.mac = mac
+        self.change = change
+        self.base = load_data(file_name)
+        self.model = ManifestModel(Loading(file_name, mac=mac, change=change)) if command == 'loading' else None
+
+    def __call__(self, records):
+        """Returns the results of a batch of records, as a list of dictionaries"""
+        return getattr(self, self.command)(records)
+
+    def cg(self, records):
+        data = design_data(records, self.base)
+        return columns_to_records({'cg': CenterOfGravity(data=data).cg}, len(records))
+
+    def scissor(self, records):
+        data = design_data(records, self.base)
+        cg, min_xcg, max_xcg = loading_range(data, self.mac, self.change)
+        tail = Stabcont(data=data).required_tail(min_xcg, max_xcg)
+        results = {'cg': cg, 'min_xcg': min_xcg, 'max_xcg': max_xcg, **{name: tail[name] for name in TAIL}}
+        return columns_to_records(results, len(records))
+
+    def loading(self, records):
+        items = [record['items'] for record in records]
+        counts = [len(record_items) for record_items in items]
+        chunk = {  # Rows labelled with the JSON id of their record, for the error messages
+            'flight': np.repeat([json.dumps(record.get('id')) for record in records], counts),
+            'kind': np.array([item['kind'] for record_items in items for item in record_items], dtype=str),
+            'location': np.array([item.get('location', '') for record_items in items for item in record_items],
+                                 dtype=str),
+            'mass': np.array([str(item.get('mass', '')) for record_items in items for item in record_items],
+                             dtype=str),
+        }
+        index = np.repeat(np.arange(len(records)), counts)
+        totals = [np.bincount(index, weights=values, minlength=len(records))
+                  for values in self.model.items(chunk)]  # mass, moment, fuel
+        results = self.model.results(None, *totals)
+        return columns_to_records({name: results[name] for name in ['xcg', 'mass', 'violation']}, len(records))
+
+
+def error(exception):
+    return f'{type(exception).__name__}: {exception}'
+
+
+def evaluate_lines(evaluator, lines):
+    """Returns the result lines of a batch of JSON lines
+
+    The valid records are evaluated together. If the batch fails, its records are evaluated one by one so that only
+    the bad ones are answered with an error.
+    """
+    records = []
+    parsed = []  # The record of each line, or the response to a line that is not a record
+    for line in lines:
+        try:
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError('record is not a JSON object')
+        except ValueError as exception:
+            parsed.append({'id': None, 'error': error(exception)})
+        else:
+            parsed.append(None)
+            records.append(record)
+
+    try:
+        results = evaluator(records) if records else []
+    except Exception:
+        results = []
+        for record in records:
+            try:
+                results.append(evaluator([record])[0])
+            except Exception as exception:
+                results.append({'error': error(exception)})
+
+    records, results = iter(records), iter(results)
+    output = []
+    for response in parsed:
+        if response is None:
+            record = next(records)
+            response = {'id': record['id'], **next(results)} if 'id' in record else next(results)
+        output.append(json.dumps(response))
+    return output
+
+
+def run_batch(evaluator, stdin=sys.stdin, stdout=sys.stdout, batch_size=1024):
+    """Answers the records read from stdin in batches of batch_size lines until it is closed"""
+    lines = (line for line in stdin if line.strip())
+    while batch := list(itertools.islice(lines, batch_size)):
+        stdout.write('\n'.join(evaluate_lines(evaluator, batch)) + '\n')
+        stdout.flush()
+
+
+def run_single(command, file_name, mac=1, change=0, plot=None):
+    """Returns the results of the data file, saving the plot of the command to the file plot if given"""
+    if command == 'cg':
+        return {'cg': CenterOfGravity(file_name).cg}
+
+    diagram = Loading(file_name, mac=mac, change=change).loading_diagram()
+    if command == 'loading':
+        if plot:
+            from plots import LoadingDiagram
+            LoadingDiagram().update(diagram).save(plot)
+        return {name: diagram[name] for name in ['min_xcg', 'max_xcg', 'min_mass', 'max_mass', 'mzfw']}
+
+    ac = Stabcont(file_name)
+    if plot:
+        from plots import ScissorPlot
+        ScissorPlot().update(ac.scissor_lines(diagram['min_xcg'], diagram['max_xcg'])).save(plot)
+    return {'min_xcg': diagram['min_xcg'], 'max_xcg': diagram['max_xcg'],
+            **ac.required_tail(diagram['min_xcg'], diagram['max_xcg'])}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m aircraft', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('command', choices=COMMANDS)
+    parser.add_argument('--data', default=os.path.join(HERE, 'data.csv'), help='Aircraft data file')
+    parser.add_argument('--mac', type=float, default=1, help='mac passed to Loading')
+    parser.add_argument('--change', type=float, default=0, help='OEW c.g. shift passed to Loading')
+    parser.add_argument('--batch', action='store_true', help='Read records from stdin, write results to stdout')
+    parser.add_argument('--batch-size', type=int, default=1024, help='Records evaluated together in batch mode')
+    parser.add_argument('--plot', help='File the loading diagram or scissor plot is saved to, without --batch')
+    args = parser.parse_args(argv)
+    if args.batch_size < 1:
+        parser.error(f'--batch-size must be at least 1, got {args.batch_size}')
+
+    if args.batch:
+        if args.plot:
+            parser.error('--plot is not available with --batch')
+        run_batch(Evaluator(args.command, args.data, args.mac, args.change), batch_size=args.batch_size)
+    else:
+        results = run_single(args.command, args.data, args.mac, args.change, args.plot)
+        print(json.dumps({name: np.asarray(value).tolist() for name, value in results.items()}))
+
+
+if __name__ == "__main__":
+    main()
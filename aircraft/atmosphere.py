@@ -0,0 +1,44 @@
+"""International Standard Atmosphere up to 20 km, vectorized over altitude"""
+import numpy as np
+
+FT = 0.3048  # [m]
+KTS = 0.514444  # [m/s]
+
+GAMMA = 1.4
+R = 287  # [J/kg/K]
+G0 = 9.80665  # [m/s2]
+T0 = 288.15  # [K]
+P0 = 101325  # [Pa]
+LAPSE = 6.5 / 1000  # [K/m]
+H_TROPOPAUSE = 11000  # [m]
+T_TROPOPAUSE = T0 - H_TROPOPAUSE * LAPSE
+P_TROPOPAUSE = P0 * (T_TROPOPAUSE / T0) ** (G0 / (R * LAPSE))
+
+
+def temperature(h):
+    """Returns the temperature [K] at altitude h [m]"""
+    h = np.asarray(h, dtype=float)
+    return np.where(h <= H_TROPOPAUSE, T0 - h * LAPSE, T_TROPOPAUSE)
+
+
+def pressure(h):
+    """Returns the pressure [Pa] at altitude h [m]"""
+    h = np.asarray(h, dtype=float)
+    troposphere = P0 * (temperature(h) / T0) ** (G0 / (R * LAPSE))
+    stratosphere = P_TROPOPAUSE * np.exp(-G0 / (R * T_TROPOPAUSE) * (h - H_TROPOPAUSE))
+    return np.where(h <= H_TROPOPAUSE, troposphere, stratosphere)
+
+
+def density(h):
+    """Returns the density [kg/m3] at altitude h [m]"""
+    return pressure(h) / (R * temperature(h))
+
+
+def speed_of_sound(h):
+    """Returns the speed of sound [m/s] at altitude h [m]"""
+    return np.sqrt(GAMMA * temperature(h) * R)
+
+
+def mach(v_kts, h_ft):
+    """Returns the Mach number of a true airspeed v_kts [kts] at altitude h_ft [ft]"""
+    return np.asarray(v_kts, dtype=float) * KTS / speed_of_sound(np.asarray(h_ft, dtype=float) * FT)
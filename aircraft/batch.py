@@ -0,0 +1,101 @@
+"""Evaluates many aircraft designs in a single vectorized pass"""
+import numpy as np
+
+from cg_calculation import CenterOfGravity
+from helpers import load_data
+from Stabcont import Stabcont
+
+
+def as_columns(params):
+    """Returns a dictionary of 1d arrays from a dict of arrays or a structured array"""
+    if isinstance(params, np.ndarray) and params.dtype.names:
+        columns = {name: params[name] for name in params.dtype.names}
+    else:
+        columns = dict(params)
+
+    columns = {name: np.atleast_1d(np.asarray(value, dtype=float)).ravel() for name, value in columns.items()}
+    if not columns:
+        return columns
+
+    arrays = np.broadcast_arrays(*columns.values())
+    return dict(zip(columns, arrays))
+
+
+def sweep_data(params, file_name='data.csv', base=None):
+    """Returns the data dictionary with the swept parameters as column arrays of shape (n, 1)
+
+    args:
+        params (dict or np.ndarray): parameter name -> values, or a structured array
+        file_name (str): csv file with the baseline values of the parameters that are not swept
+        base (dict): optional pre-loaded baseline data, used instead of file_name
+    """
+    data = load_data(file_name) if base is None else dict(base)
+    columns = as_columns(params)
+
+    unknown = set(columns) - set(data)
+    if unknown:
+        raise KeyError(f"Unknown design parameters: {sorted(unknown)}")
+
+    for name, values in columns.items():
+        data[name] = values[:, np.newaxis]
+
+    n = len(next(iter(columns.values()))) if columns else 1
+    return data, n
+
+
+def design_sweep(params, file_name='data.csv', xcg=None, base=None, cg_range=None):
+    """Returns the stability and control quantities for every design variant
+
+    args:
+        params (dict or np.ndarray): parameter name -> values, or a structured array. Values are broadcast together.
+        file_name (str): csv file with the baseline values of the parameters that are not swept
+        xcg (array): optional x_cg/mac values where the scissor-plot lines are evaluated
+        base (dict): optional pre-loaded baseline data, used instead of file_name
+        cg_range (tuple): optional (min_xcg, max_xcg), scalars or arrays of length n, to solve the tail requirement
+
+    returns:
+        dict: 1d arrays of length n for the OEW c.g. ('cg_oew') and each coefficient and, if xcg is given, (n, len(xcg)) arrays for the
+        stability ('stab'), stability with static margin ('stab_sm') and control ('cont') lines. With cg_range, the
+        entries of Stabcont.required_tail are added as arrays of length n.
+    """
+    data, n = sweep_data(params, file_name=file_name, base=base)
+    ac = Stabcont(file_name, data=data)
+
+    def column(value):
+        return np.broadcast_to(value, (n, 1)).reshape(n)
+
+    results = {'cg_oew': column(CenterOfGravity(file_name, data=data).cg)}
+    for fc in ['cruise', 'land']:
+        results[f'CLaw_{fc}'] = column(ac.getCLaw(fc))
+        results[f'CLah_{fc}'] = column(ac.getCLah(fc))
+        results[f'CLaminh_{fc}'] = column(ac.getCLaminh(fc))
+        results[f'x_ac_{fc}'] = column(ac.getx_ac(fc))
+    results['downwash'] = column(ac.getdownwash())
+    results['cmac'] = column(ac.getcmac())
+
+    if xcg is not None:
+        xcg = np.atleast_1d(np.asarray(xcg, dtype=float))
+        shape = (n, len(xcg))
+        stab, stab_sm = ac.stabline(xcg)
+        results['stab'] = np.broadcast_to(stab, shape)
+        results['stab_sm'] = np.broadcast_to(stab_sm, shape)
+        results['cont'] = np.broadcast_to(ac.contline(xcg), shape)
+
+    if cg_range is not None:
+        min_xcg, max_xcg = (np.reshape(np.asarray(value, dtype=float), (-1, 1)) for value in cg_range)
+        for name, value in ac.required_tail(min_xcg, max_xcg).items():
+            results[name] = column(value)
+
+    return results
+
+
+def main():
+    A = np.linspace(7, 11, 5)
+    results = design_sweep({'A': A}, xcg=np.arange(0, 1, 0.05))
+    for i, value in enumerate(A):
+        print(f"{'A':<6} {value:<8.3f} {'x_ac':<6} {results['x_ac_cruise'][i]:<10.5f} "
+              f"{'deda':<6} {results['downwash'][i]:<10.5f}")
+
+
+if __name__ == "__main__":
+    main()
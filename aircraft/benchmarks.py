@@ -0,0 +1,205 @@
+"""Benchmarks of the c.g., loading and stability hot paths
+
+Latencies depend on the machine, so the baseline is kept per machine and is not committed. The first full run on a
+machine finds no baseline file, writes its results as the baseline and says so; later runs compare against it and exit
+with status 1 when a case is slower than --threshold times its baseline latency. After an intended change in
+performance, record a new baseline with --save-baseline; with -k only the selected cases of the baseline are replaced.
+
+    python benchmarks.py                    # First run: writes benchmarks_baseline.json
+    python benchmarks.py                    # Later runs: compares against it
+    python benchmarks.py --save-baseline    # Replaces the baseline
+    python benchmarks.py --output results.json --baseline other_baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from batch import design_sweep
+from cabin import CabinLayout, Zone
+from cg_calculation import CenterOfGravity
+from loading import Loading
+from Stabcont import Stabcont
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DATA_FILES = ['data.csv', 'NewData.csv']
+BASELINE = os.path.join(HERE, 'benchmarks_baseline.json')
+XCG = np.arange(0, 1, 0.05)
+
+
+def cases(scale=1):
+    """Returns the benchmark cases as name -> (function, items processed per call)"""
+    cases = {}
+
+    for name in DATA_FILES:
+        file_name = os.path.join(HERE, name)
+        load = Loading(file_name)
+        ac = Stabcont(file_name)
+
+        def stabline(ac=ac):
+            ac.clear_cache()
+            ac.stabline(XCG)
+
+        def contline(ac=ac):
+            ac.clear_cache()
+            ac.contline(XCG)
+
+        cases[f'cg_build[{name}]'] = (lambda file_name=file_name: CenterOfGravity(file_name), 1)
+        cases[f'cg_shift[{name}]'] = (lambda load=load: load.get_cg_shift(plot=False), 1)
+        cases[f'stabline[{name}]'] = (stabline, 1)
+        cases[f'contline[{name}]'] = (contline, 1)
+        cases[f'scissor[{name}]'] = (lambda file_name=file_name: Stabcont(file_name).required_tail(), 1)
+
+    # Synthetic inputs: long cabins and large design batches
+    file_name = os.path.join(HERE, DATA_FILES[0])
+    for n_seats in [170 * scale, 1700 * scale]:
+        load = Loading(file_name)
+        load.n_seats = n_seats
+        cases[f'cg_shift[seats={n_seats}]'] = (lambda load=load: load.get_cg_shift(plot=False), 6 * n_seats)
+
+    # Two-class cabin of 400 seats
+    cabin = CabinLayout([Zone('business', 6.0, 4, 0.95, 'AB|CD'), Zone('economy', 9.8, 64 * scale, 0.78, 'ABC|DEF')])
+    load = Loading(file_name, cabin=cabin)
+    cases[f'cg_shift[cabin={cabin.n_seats}]'] = (lambda load=load: load.get_cg_shift(plot=False), 2 * cabin.n_seats)
+
+    for n in [1_000 * scale, 100_000 * scale]:
+        params = {'A': np.linspace(7, 11, n), 'S_h': np.linspace(12, 20, n)}
+        cases[f'design_sweep[n={n}]'] = (
+            lambda params=params: design_sweep(params, file_name=file_name, xcg=XCG, cg_range=(0.1, 0.4)), n)
+
+    return cases
+
+
+def measure(function, min_time=0.2, rounds=5):
+    """Returns the median per-call latency [s] over rounds of calls lasting at least min_time each"""
+    function()  # Warm up
+
+    calls = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(calls):
+            function()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / rounds:
+            break
+        calls *= 2
+
+    latencies = [elapsed / calls]
+    for _ in range(rounds - 1):
+        start = time.perf_counter()
+        for _ in range(calls):
+            function()
+        latencies.append((time.perf_counter() - start) / calls)
+
+    return statistics.median(latencies)
+
+
+def peak_memory(function):
+    """Returns the peak memory [bytes] allocated during one call"""
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run(selected=None, scale=1, min_time=0.2):
+    """Returns the benchmark results as a dictionary ready to be written as JSON"""
+    results = {}
+    for name, (function, items) in cases(scale).items():
+        if selected and not any(pattern in name for pattern in selected):
+            continue
+
+        latency = measure(function, min_time=min_time)
+        results[name] = {
+            'latency_s': latency,
+            'calls_per_s': 1 / latency,
+            'items_per_s': items / latency,
+            'peak_bytes': peak_memory(function),
+        }
+
+    return {
+        'meta': {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': sys.version.split()[0],
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+        },
+        'results': results,
+    }
+
+
+def compare(results, baseline, threshold=1.25):
+    """Returns the cases whose latency is more than threshold times the baseline latency"""
+    regressions = {}
+    for name, result in results['results'].items():
+        reference = baseline['results'].get(name)
+        if reference is not None and result['latency_s'] > threshold * reference['latency_s']:
+            regressions[name] = result['latency_s'] / reference['latency_s']
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-k', dest='selected', action='append', help='Only run cases whose name contains this')
+    parser.add_argument('--scale', type=int, default=1, help='Multiplies the synthetic seat counts and batch sizes')
+    parser.add_argument('--min-time', type=float, default=0.2, help='Minimum measuring time per case [s]')
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    parser.add_argument('--baseline', default=BASELINE,
+                        help='JSON results to compare against, written by the first run (default: %(default)s)')
+    parser.add_argument('--save-baseline', action='store_true', help='Write the results to --baseline')
+    parser.add_argument('--threshold', type=float, default=1.25, help='Slowdown ratio flagged as a regression')
+    args = parser.parse_args(argv)
+
+    results = run(args.selected, scale=args.scale, min_time=args.min_time)
+
+    # A run of selected cases only writes a new baseline when asked, and then keeps the other cases of the old one
+    exists = os.path.exists(args.baseline)
+    save_baseline = args.save_baseline or not (exists or args.selected)
+    baseline = None
+    if exists:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    print(f"{'Case':<32} {'Latency [us]':>14} {'Calls/s':>12} {'Items/s':>14} {'Peak [kB]':>11} {'vs base':>8}")
+    for name, result in results['results'].items():
+        ratio = ''
+        if baseline and name in baseline['results']:
+            ratio = f"{result['latency_s'] / baseline['results'][name]['latency_s']:.2f}x"
+        print(f"{name:<32} {result['latency_s'] * 1e6:>14.1f} {result['calls_per_s']:>12.1f} "
+              f"{result['items_per_s']:>14.0f} {result['peak_bytes'] / 1024:>11.1f} {ratio:>8}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if save_baseline:
+        saved = results
+        if args.selected and baseline:
+            saved = {**results, 'results': {**baseline['results'], **results['results']}}
+        with open(args.baseline, 'w') as f:
+            json.dump(saved, f, indent=2)
+        if args.save_baseline:
+            print(f"Baseline {'updated with the selected cases' if saved is not results else 'replaced'}: {args.baseline}")
+        else:
+            print(f"No baseline found, wrote this run to {args.baseline}; later runs compare against it")
+        return 0
+
+    if baseline:
+        regressions = compare(results, baseline, args.threshold)
+        for name, ratio in regressions.items():
+            print(f"REGRESSION {name}: {ratio:.2f}x slower than baseline")
+        return 1 if regressions else 0
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
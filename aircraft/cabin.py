@@ -0,0 +1,134 @@
+"""Cabin layouts: zones of seat rows and the seat-arm index the loading diagram boards passengers from
+
+A zone is a block of equally spaced rows sharing a seat map such as 'ABC|DEF', where '|' marks an aisle. The seats at
+either end of the map are window seats, the seats next to an aisle are aisle seats and the others middle seats. The
+default layout, a single column of window, middle and aisle seats ('ABC|'), is the cabin of Loading.
+"""
+import numpy as np
+
+KINDS = ['window', 'middle', 'aisle']
+FIRST_ROW = 2.4 / 11.3 * 26.50  # c.g. of the first row of the default cabin [m]
+
+
+class Zone:
+
+    def __init__(self, name, x_start, n_rows, pitch, seats='ABC|'):
+        """Rows of a cabin zone
+
+        args:
+            name (str): zone name, e.g. 'business'
+            x_start (float or array): position of the first row from the nose [m]
+            n_rows (int): number of rows
+            pitch (float or array): distance between rows [m]
+            seats (str): seat letters of a row, '|' marking the aisles
+        """
+        self.name = name
+        self.x_start = x_start
+        self.n_rows = n_rows
+        self.pitch = pitch
+        self.seats = seats
+
+    def seat_kinds(self):
+        """Returns the letters of a row and the index in KINDS of their kind"""
+        letters, kinds = [], []
+        for i, letter in enumerate(self.seats):
+            if letter == '|':
+                continue
+            if i == 0 or i == len(self.seats) - 1:
+                kind = 'window'
+            elif '|' in (self.seats[i - 1], self.seats[i + 1]):
+                kind = 'aisle'
+            else:
+                kind = 'middle'
+            letters.append(letter)
+            kinds.append(KINDS.index(kind))
+        return letters, kinds
+
+    def row_positions(self):
+        """Returns the positions of the rows from the nose [m], designs on the leading axes"""
+        x_start = np.asarray(self.x_start, dtype=float)[..., np.newaxis]
+        pitch = np.asarray(self.pitch, dtype=float)[..., np.newaxis]
+        return x_start + pitch * np.arange(self.n_rows)
+
+
+class CabinLayout:
+
+    def __init__(self, zones, blocked=()):
+        """Builds the seat index of the zones, front to back, with the rows numbered from 1 across the zones
+
+        args:
+            zones (list): Zone objects, front to back
+            blocked (iterable): labels of the seats that are not sold, e.g. ['12B', '12E']
+        """
+        self.zones = zones
+        self.blocked = set(blocked)
+
+        # Rows, with the design axes of the zones broadcast together
+        positions = [zone.row_positions() for zone in zones]
+        shape = np.broadcast_shapes(*(x.shape[:-1] for x in positions))
+        self.row_x = np.concatenate([np.broadcast_to(x, shape + x.shape[-1:]) for x in positions], axis=-1)
+        self.n_rows = self.row_x.shape[-1]
+
+        # Seats, in row order
+        rows, letters, kinds, zone_index = [], [], [], []
+        first_row = 0
+        for i, zone in enumerate(zones):
+            zone_letters, zone_kinds = zone.seat_kinds()
+            rows.append(np.repeat(np.arange(first_row, first_row + zone.n_rows), len(zone_letters)))
+            letters.append(np.tile(zone_letters, zone.n_rows))
+            kinds.append(np.tile(zone_kinds, zone.n_rows))
+            zone_index.append(np.full(zone.n_rows * len(zone_letters), i))
+            first_row += zone.n_rows
+
+        row = np.concatenate(rows)
+        letter = np.concatenate(letters)
+        labels = np.char.add((row + 1).astype(str), letter)
+        unknown = self.blocked - set(labels.tolist())
+        if unknown:
+            raise ValueError(f"Blocked seats not in the cabin: {', '.join(sorted(unknown))}")
+        sold = ~np.isin(labels, list(self.blocked))
+
+        self.row = row[sold]  # Index of the row of each seat
+        self.letter = letter[sold]
+        self.label = labels[sold]
+        self.kind = np.concatenate(kinds)[sold]  # Index in KINDS
+        self.zone = np.concatenate(zone_index)[sold]
+        self.n_seats = len(self.row)
+
+        self._orders = {}
+
+    @classmethod
+    def single_class(cls, data, n_rows=17, seats='ABC|'):
+        """Returns the cabin of Loading, n_rows rows of a window, a middle and an aisle seat by default
+
+        The rows span dist_seats * n_rows behind the first row.
+        """
+        pitch = np.asarray(data['dist_seats'], dtype=float) * n_rows / max(n_rows - 1, 1)
+        return cls([Zone('economy', FIRST_ROW, n_rows, pitch, seats)])
+
+    def row_arms(self, data):
+        """Returns the c.g. (x/mac) of the rows, front to back"""
+        XLEMAC = np.asarray(data['XLEMAC'], dtype=float)[..., np.newaxis]
+        mac = np.asarray(data['mac'], dtype=float)[..., np.newaxis]
+        return (self.row_x - XLEMAC) / mac
+
+    def seat_arms(self, data):
+        """Returns the c.g. (x/mac) of the seats, in the order of the index"""
+        return self.row_arms(data)[..., self.row]
+
+    def order(self, kinds=KINDS):
+        """Returns the seat indices of the front-first and aft-first boarding orders, shape (2, n)
+
+        The seats of each kind in kinds board one kind after the other, front to back or back to front.
+        """
+        kinds = tuple(kinds)
+        if kinds not in self._orders:
+            groups = [np.flatnonzero(self.kind == KINDS.index(kind)) for kind in kinds]
+            self._orders[kinds] = np.stack([np.concatenate(groups), np.concatenate([g[::-1] for g in groups])])
+        return self._orders[kinds]
+
+    def boarding_orders(self, data, mass_pax, kinds=KINDS):
+        """Returns the c.g. (x/mac) and mass of the passengers in the boarding orders of order(), shape (..., 2, n)"""
+        xcg = self.seat_arms(data)[..., self.order(kinds)]
+        mass = np.broadcast_to(np.asarray(mass_pax, dtype=float), xcg.shape)
+        return xcg, mass
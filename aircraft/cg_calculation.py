@@ -1,13 +1,83 @@
 import numpy as np
 
-from helpers import load_data
+from helpers import get_logger, load_parameters
+
+logger = get_logger('cg_calculation')
+
+
+# Lifting surfaces, one row per surface in the order of SURFACES
+SURFACES = ['w', 'h', 'v']
+SURFACE_KEYS = {
+    # Column of the surface table: data key of each surface
+    'taper': ['taper', 'taper_h', 'taper_v'],
+    'quart_sweep': ['quart_sweep', 'quart_sweep_h', 'quart_sweep_v'],
+    'A': ['A', 'A_h', 'A_v'],
+    'S': ['S', 'S_h', 'S_v'],
+    'span': ['b', 'b_h', 'b_half_v'],
+    'nose_distance': ['nose_distance_w', 'nose_distance_h', 'nose_distance_v'],
+}
+SURFACE_CONSTANTS = {
+    'span_factor': [1, 1, 2],  # The data holds the half span of the vertical tail
+    'cg_span': [0.4, 0.38, 0.38],  # Spanwise c.g. position as a fraction of the span
+    'cg_chord': [0.38, 0.42, 0.43],  # Chordwise c.g. position as a fraction of the local chord
+}
+
+# Mass groups, the lifting surfaces first in the order of SURFACES
+GROUPS = ['wing', 'horizontal_tail', 'vertical_tail', 'fuselage']
+
+# Mass factor: (group it is added to, entry of the areas it multiplies)
+MASS_TERMS = {
+    'wing': ('wing', 'wing'),
+    'main_gear': ('wing', 'systems'),  # systems "area" is the MTOW
+    'power_plant': ('wing', 'power_plant'),
+    'horizontal_tail': ('horizontal_tail', 'horizontal_tail'),
+    'vertical_tail': ('vertical_tail', 'vertical_tail'),
+    'fuselage': ('fuselage', 'fuselage'),
+    'nose_gear': ('fuselage', 'systems'),
+    'systems': ('fuselage', 'systems'),
+}
+MASS_MATRIX = np.array([[group == term_group for term_group, _ in MASS_TERMS.values()] for group in GROUPS], dtype=float)
+
+
+def surface_table(data):
+    """Returns the surface table: columns of shape (3, ...) with a row per surface and the designs after it
+
+    Besides SURFACE_KEYS and SURFACE_CONSTANTS, the table holds the full span 'b', root chord 'cr' and leading edge
+    sweep 'sweep_le' [rad] of each surface.
+    """
+    table = {column: np.stack(np.broadcast_arrays(*(np.asarray(data[key], dtype=float) for key in keys)))
+             for column, keys in SURFACE_KEYS.items()}
+
+    for column, values in SURFACE_CONSTANTS.items():
+        table[column] = np.array(values, dtype=float)
+
+    # Align the design axes of all columns so that they broadcast against each other
+    ndim = max(value.ndim for value in table.values())
+    for column, value in table.items():
+        table[column] = value.reshape(value.shape[:1] + (1,) * (ndim - value.ndim) + value.shape[1:])
+
+    table['b'] = table['span'] * table['span_factor']
+    table['cr'] = 2 * table['S'] / ((table['taper'] + 1) * table['b'])
+
+    tr = table['taper']
+    table['sweep_le'] = np.arctan(np.tan(np.radians(table['quart_sweep'])) - 4 / table['A'] * (-0.25 * (1 - tr) / (1 + tr)))
+
+    return table
 
 
 class CenterOfGravity:
 
-    def __init__(self, file_name='data.csv', transport=True):
-        """Computes the aircraft center of gravity at operational empty weight"""
-        self.data = load_data(file_name)
+    def __init__(self, file_name='data.csv', transport=True, data=None, factors=None):
+        """Computes the aircraft center of gravity at operational empty weight
+
+        args:
+            file_name (str): csv file with the aircraft data
+            transport (bool): use the mass factors of transport aircraft instead of those of light aircraft
+            data (dict): optional pre-loaded data; values may be NumPy arrays to evaluate many designs at once
+            factors (dict): optional mass factors replacing the defaults, also as arrays of designs
+        """
+        # Read-only and shared with every other user of the file
+        self.data = load_parameters(file_name) if data is None else data
 
         if transport:
             self.factors = {
@@ -32,7 +102,15 @@ class CenterOfGravity:
                 'systems': 0.17,  # w.r.t MTO
             }
 
+        if factors:
+            unknown = set(factors) - set(self.factors)
+            if unknown:
+                raise KeyError(f"Unknown mass factors: {sorted(unknown)}")
+            self.factors.update(factors)
+
+        self.surfaces = surface_table(self.data)
         self.get_cr()
+        self.sweep_le = self.surfaces['sweep_le'][SURFACES.index('v')]  # Of the last surface placed, the vertical tail
 
         self.areas = self.get_areas()
 
@@ -43,9 +121,7 @@ class CenterOfGravity:
 
     def get_cr(self):
         """Computes the chord length at the rooot for wing, vertica tail and horizontal tail"""
-        self.cr = 2 * self.data['S'] / ((self.data['taper'] + 1) * self.data['b'])
-        self.cr_h = 2 * self.data['S_h'] / ((self.data['taper_h'] + 1) * self.data['b_h'])
-        self.cr_v = 2 * self.data['S_v'] / ((self.data['taper_v'] + 1) * self.data['b_half_v'] * 2)
+        self.cr, self.cr_h, self.cr_v = self.surfaces['cr']
 
     @staticmethod
     def wet_to_exposed(mass):
@@ -88,50 +164,26 @@ class CenterOfGravity:
 
     def components_mass(self):
         """Returns a dictionary with the mass of each a/c component"""
-        factors = self.factors
-        areas = self.areas
-        MTOW = self.data['MTOW']
-        ME = self.data['ME']  # We got from wikipedia  ALF502R-3
-        area_w = areas['wing']
-        area_f = areas['fuselage']
-        area_v = areas['vertical_tail']
-        area_h = areas['horizontal_tail']
-
-        mass = {}
-
-        mass['wing'] = factors['wing'] * area_w + factors['main_gear'] * MTOW + factors['power_plant'] * ME
-        mass['fuselage'] = factors['fuselage'] * area_f + factors['nose_gear'] * MTOW + factors['systems'] * MTOW
-        mass['horizontal_tail'] = factors['horizontal_tail'] * area_h
-        mass['vertical_tail'] = factors['vertical_tail'] * area_v
-        print(mass['wing'],mass['fuselage'],mass['horizontal_tail'],mass['vertical_tail'])
+        terms = np.stack(np.broadcast_arrays(*(self.factors[factor] * np.asarray(self.areas[area], dtype=float)
+                                               for factor, (_, area) in MASS_TERMS.items())))
+        self.group_mass = np.tensordot(MASS_MATRIX, terms, axes=1)  # Rows in the order of GROUPS
+
+        mass = dict(zip(GROUPS, self.group_mass))
+        logger.debug('mass wing=%s fuselage=%s horizontal_tail=%s vertical_tail=%s',
+                     mass['wing'], mass['fuselage'], mass['horizontal_tail'], mass['vertical_tail'])
         return mass
 
     def cg_distance_from_nose(self, x_loc, y, surface='w'):
         """Returns the cg distance of the wing, vertical tail, and horizontal tail"""
-
-        if surface == 'w':
-            tr = self.data['taper']
-            quarter_sweep = self.data['quart_sweep']
-            A = self.data['A']
-            distance_to_root = self.data['nose_distance_w']
-        elif surface == 'v':
-            tr = self.data['taper_v']
-            quarter_sweep = self.data['quart_sweep_v']
-            A = self.data['A_v']
-            distance_to_root = self.data['nose_distance_v']
-        elif surface == 'h':
-            tr = self.data['taper_h']
-            quarter_sweep = self.data['quart_sweep_h']
-            A = self.data['A_h']
-            distance_to_root = self.data['nose_distance_h']
-        else:
+        if surface not in SURFACES:
             return None
+        i = SURFACES.index(surface)
 
-        sweep_le = np.arctan(np.tan(np.radians(quarter_sweep)) - 4 / A * (-0.25 * (1 - tr) / (1 + tr)))
+        sweep_le = self.surfaces['sweep_le'][i]
         self.sweep_le = sweep_le
 
         # The c.g. is given as the distance to the leading edge of the root + the distance of the leading edge of the root to the a/c nose
-        cg_distance = x_loc + y * np.tan(sweep_le) + distance_to_root
+        cg_distance = x_loc + y * np.tan(sweep_le) + self.surfaces['nose_distance'][i]
 
         return cg_distance
 
@@ -142,50 +194,38 @@ class CenterOfGravity:
             root_pctg (float): pctg of the root where the chord is wanted
             surface (str): 'w' for wing, 'v' for vertical tail, 'h' for horizontal tail
         """
-        if surface == 'w':
-            taper_ratio = self.data['taper']
-            b = self.data['b']
-            cr = self.cr
-        elif surface == 'v':
-            taper_ratio = self.data['taper_v']
-            b = self.data['b_half_v'] * 2
-            cr = self.cr_v
-        elif surface == 'h':
-            taper_ratio = self.data['taper_h']
-            b = self.data['b_h']
-            cr = self.cr_h
-        else:
+        if surface not in SURFACES:
             return None
+        i = SURFACES.index(surface)
+
+        taper_ratio = self.surfaces['taper'][i]
+        b = self.surfaces['b'][i]
+        cr = self.surfaces['cr'][i]
 
         y = span_pctg * b / 2
         return cr * (1 - 2 * (1 - taper_ratio) * y / b), y
 
     def components_cg(self):
         """Returns a dictionary with the cg of each a/c component"""
-        cgs = {}
+        table = self.surfaces
 
         # To compute the c.g. position: first the it is found as a distance in the chord. Then it is transformed into distance to nose
+        # All lifting surfaces at once, one row per surface
+        y = table['cg_span'] * table['b'] / 2
+        chord = table['cr'] * (1 - 2 * (1 - table['taper']) * y / table['b'])
+        x_surfaces = chord * table['cg_chord'] + y * np.tan(table['sweep_le']) + table['nose_distance']
 
-        chord_cg_w, dist_le_w = self.chord_at_pctg(0.4, surface='w')
-        cgs['wing'] = self.cg_distance_from_nose(chord_cg_w * 0.38, dist_le_w, surface='w')
-
-        chord_cg_h, dist_le_h = self.chord_at_pctg(0.38, surface='h')
-        cgs['horizontal_tail'] = self.cg_distance_from_nose(chord_cg_h * 0.42, dist_le_h, surface='h')
+        x_fuselage = 0.42 * np.asarray(self.data['l_f'], dtype=float)
+        shape = np.broadcast_shapes(x_surfaces.shape[1:], x_fuselage.shape)
+        self.group_cg = np.concatenate([np.broadcast_to(x_surfaces, x_surfaces.shape[:1] + shape),
+                                        np.broadcast_to(x_fuselage, (1,) + shape)])  # Order of GROUPS
 
-        chord_cg_v, dist_le_v = self.chord_at_pctg(0.38, surface='v')
-        cgs['vertical_tail'] = self.cg_distance_from_nose(chord_cg_v * 0.43, dist_le_v, surface='v')
-
-        cgs['fuselage'] = 0.42 * self.data['l_f']
-
-        return cgs
+        return dict(zip(GROUPS, self.group_cg))
 
     def aircraft_cg(self):
         """Returns the aircraft cg wrt the three main groups: wing, fuselage and tail"""
-        numerator, denominator = 0, 0
-
-        for group in ['wing', 'horizontal_tail', 'vertical_tail', 'fuselage']:
-            numerator += self.mass[group] * self.cgs[group]
-            denominator += self.mass[group]
+        numerator = (self.group_mass * self.group_cg).sum(axis=0)
+        denominator = self.group_mass.sum(axis=0)
 
         XLEMAC = self.data['XLEMAC']
         mac = self.data['mac']
@@ -0,0 +1,116 @@
+"""Lift-curve slopes and downwash tabulated over the altitude x speed flight envelope"""
+import bisect
+
+import numpy as np
+
+from atmosphere import mach
+from helpers import fingerprint
+from Stabcont import Stabcont
+
+COLUMNS = ['mach', 'CLaw', 'CLah', 'CLaminh', 'downwash']
+
+_tables = {}  # (data fingerprint, altitudes, speeds) -> EnvelopeTable
+
+
+class EnvelopeTable:
+
+    def __init__(self, ac, altitudes, speeds):
+        """Tabulates the cruise lift-curve slopes and downwash of an aircraft on an altitude x speed grid
+
+        The grid is evaluated in one pass by giving Stabcont the whole grid of Mach numbers as its cruise Mach number.
+
+        args:
+            ac (Stabcont): aircraft
+            altitudes (array): at least 2 strictly increasing altitudes [ft]
+            speeds (array): at least 2 strictly increasing true airspeeds [kts], subsonic on the whole grid
+        """
+        self.altitudes = np.asarray(altitudes, dtype=float)
+        self.speeds = np.asarray(speeds, dtype=float)
+        for name, axis in [('altitudes', self.altitudes), ('speeds', self.speeds)]:
+            if axis.ndim != 1 or len(axis) < 2 or np.any(np.diff(axis) <= 0):
+                raise ValueError(f"{name} must be at least 2 strictly increasing values, got {axis}")
+        self._altitudes, self._speeds = self.altitudes.tolist(), self.speeds.tolist()
+
+        grid = Stabcont(ac.file_name, data=ac.data)
+        grid.data['mach_cr'] = mach(self.speeds[np.newaxis, :], self.altitudes[:, np.newaxis])
+        if np.max(grid.data['mach_cr']) >= 1:
+            raise ValueError(f"The grid reaches Mach {np.max(grid.data['mach_cr']):.3f}, the lift-curve slopes are only "
+                             "defined for subsonic speeds")
+
+        self.table = {
+            'mach': grid.data['mach_cr'],
+            'CLaw': grid.getCLaw('cruise'),
+            'CLah': grid.getCLah('cruise'),
+            'CLaminh': grid.getCLaminh('cruise'),
+            'downwash': grid.getdownwash(),
+        }
+        self.stack = np.stack([np.broadcast_to(self.table[column], self.table['mach'].shape) for column in COLUMNS])
+
+    def query(self, altitude, speed):
+        """Returns the COLUMNS bilinearly interpolated at the altitudes [ft] and speeds [kts], clipped to the grid"""
+        if np.ndim(altitude) == 0 and np.ndim(speed) == 0:
+            return self.query_point(float(altitude), float(speed))
+
+        i, wi = self._cell(self.altitudes, np.asarray(altitude, dtype=float))
+        j, wj = self._cell(self.speeds, np.asarray(speed, dtype=float))
+
+        stack = self.stack
+        low = stack[:, i, j] * (1 - wj) + stack[:, i, j + 1] * wj
+        high = stack[:, i + 1, j] * (1 - wj) + stack[:, i + 1, j + 1] * wj
+        return dict(zip(COLUMNS, low * (1 - wi) + high * wi))
+
+    def query_point(self, altitude, speed):
+        """Scalar version of query, avoiding the array overhead"""
+        i, wi = self._point_cell(self._altitudes, altitude)
+        j, wj = self._point_cell(self._speeds, speed)
+
+        cell = self.stack[:, i:i + 2, j:j + 2]
+        values = (cell[:, 0, 0] * (1 - wj) + cell[:, 0, 1] * wj) * (1 - wi) \
+            + (cell[:, 1, 0] * (1 - wj) + cell[:, 1, 1] * wj) * wi
+        return dict(zip(COLUMNS, values.tolist()))
+
+    @staticmethod
+    def _point_cell(grid, value):
+        value = min(max(value, grid[0]), grid[-1])
+        index = min(max(bisect.bisect_right(grid, value) - 1, 0), len(grid) - 2)
+        return index, (value - grid[index]) / (grid[index + 1] - grid[index])
+
+    @staticmethod
+    def _cell(grid, values):
+        """Returns the index of the grid cell holding each value and the relative position inside it"""
+        values = np.clip(values, grid[0], grid[-1])
+        index = np.clip(np.searchsorted(grid, values, side='right') - 1, 0, len(grid) - 2)
+        weight = (values - grid[index]) / (grid[index + 1] - grid[index])
+        return index, weight
+
+
+def envelope_table(ac, altitudes=None, speeds=None):
+    """Returns the envelope table of an aircraft, reusing the one built before for the same data and grid
+
+    args:
+        ac (Stabcont or str): aircraft or its data file
+        altitudes (array): altitudes [ft], by default 0 to 41000 ft every 1000 ft
+        speeds (array): true airspeeds [kts], by default 100 to 500 kts every 10 kts
+    """
+    if isinstance(ac, str):
+        ac = Stabcont(ac)
+    altitudes = np.arange(0, 41001, 1000) if altitudes is None else np.asarray(altitudes, dtype=float)
+    speeds = np.arange(100, 501, 10) if speeds is None else np.asarray(speeds, dtype=float)
+
+    key = (fingerprint(ac.data, sorted(ac.data), content=True), altitudes.tobytes(), speeds.tobytes())
+    if key not in _tables:
+        _tables[key] = EnvelopeTable(ac, altitudes, speeds)
+    return _tables[key]
+
+
+def main():
+    table = envelope_table('data.csv')
+    altitudes = np.array([0, 15000, 29000, 37000])
+    results = table.query(altitudes, 432)
+    for i, altitude in enumerate(altitudes):
+        print(f"{'h':<4} {altitude:<8} {'M':<3} {results['mach'][i]:<8.4f} {'CLaw':<5} {results['CLaw'][i]:<8.4f} "
+              f"{'CLaminh':<8} {results['CLaminh'][i]:<8.4f} {'deda':<5} {results['downwash'][i]:<8.4f}")
+
+
+if __name__ == "__main__":
+    main()
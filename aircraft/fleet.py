@@ -0,0 +1,106 @@
+"""Evaluates a fleet of aircraft data files in parallel
+
+    python fleet.py variants/ --output fleet.csv
+    python fleet.py "variants/*.csv" --workers 8
+"""
+import argparse
+import csv
+import glob
+import os
+import sys
+
+from cg_calculation import CenterOfGravity
+from helpers import parallel_map
+from loading import Loading
+from Stabcont import Stabcont
+
+COLUMNS = ['file', 'oew_xcg', 'min_xcg', 'max_xcg', 'sratio', 'sratio_req', 'limit', 'margin', 'error']
+
+
+def find_files(patterns):
+    """Returns the sorted data files of directories (all *.csv inside) and glob patterns"""
+    files = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            files.update(glob.glob(os.path.join(pattern, '*.csv')))
+        else:
+            files.update(glob.glob(pattern))
+    return sorted(files)
+
+
+def evaluate(file_name, change=0.6):
+    """Returns the OEW c.g., loading c.g. limits and tail requirement of one aircraft
+
+    args:
+        file_name (str): aircraft data file
+        change (float): shift [m] of the OEW c.g. passed to Loading, with the mac taken from the file
+    """
+    row = dict.fromkeys(COLUMNS, '')
+    row['file'] = file_name
+    try:
+        cg = CenterOfGravity(file_name)
+
+        load = Loading(file_name, mac=cg.data['mac'], change=change)
+        load.get_cg_shift(plot=False)
+        min_xcg, max_xcg = load.get_maxmincg()
+
+        ac = Stabcont(file_name)
+        tail = ac.required_tail(min_xcg, max_xcg)
+
+        row.update({
+            'oew_xcg': cg.cg,
+            'min_xcg': min_xcg,
+            'max_xcg': max_xcg,
+            'sratio': ac.data['S_h'] / ac.data['S'],
+            'sratio_req': tail['sratio_req'],
+            'limit': tail['limit'],
+            'margin': tail['margin'],
+        })
+    except Exception as error:  # A bad file is reported in its row instead of stopping the fleet
+        row['error'] = f'{type(error).__name__}: {error}'
+    return row
+
+
+def evaluate_files(file_names, change=0.6):
+    return [evaluate(file_name, change) for file_name in file_names]
+
+
+def run(files, change=0.6, workers=None, chunk_size=16):
+    """Returns one result row per file, evaluated on a process pool in chunks of chunk_size files"""
+    tasks = ((files[i:i + chunk_size], change) for i in range(0, len(files), chunk_size))
+
+    rows = []
+    for chunk in parallel_map(evaluate_files, tasks, workers=workers):
+        rows.extend(chunk)
+    return sorted(rows, key=lambda row: row['file'])
+
+
+def write_table(rows, f):
+    writer = csv.DictWriter(f, fieldnames=COLUMNS)
+    writer.writeheader()
+    writer.writerows(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('patterns', nargs='+', help='Directories or glob patterns of aircraft data files')
+    parser.add_argument('--output', help='csv file for the results table, stdout by default')
+    parser.add_argument('--change', type=float, default=0.6, help='OEW c.g. shift [m] used for the loading diagram')
+    parser.add_argument('--workers', type=int, default=None, help='Processes, 0 to run in this process')
+    parser.add_argument('--chunk-size', type=int, default=16, help='Files evaluated per task')
+    args = parser.parse_args(argv)
+
+    files = find_files(args.patterns)
+    rows = run(files, change=args.change, workers=args.workers, chunk_size=args.chunk_size)
+
+    if args.output:
+        with open(args.output, 'w', newline='') as f:
+            write_table(rows, f)
+    else:
+        write_table(rows, sys.stdout)
+
+    return 1 if any(row['error'] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+"""Fuel tanks, fueling and the c.g. trajectory of missions as the tanks are burned in sequence
+
+Tanks are filled in the reverse of the burn sequence, so the contents of every tank follow from the fuel on board
+alone: the last tank burned is the first one filled. A mission is a schedule of flight phases, each with a duration
+and a fuel flow, and its c.g. trajectory is evaluated on a time grid for whole batches of missions at once.
+"""
+import numpy as np
+
+
+class Tank:
+
+    def __init__(self, name, xcg, capacity):
+        """Fuel tank
+
+        args:
+            name (str): tank name
+            xcg (float or array): c.g. of the fuel in the tank (x/mac)
+            capacity (float or array): usable fuel [kg]
+        """
+        self.name = name
+        self.xcg = xcg
+        self.capacity = capacity
+
+
+class FuelSystem:
+
+    def __init__(self, tanks):
+        """Tanks in burn order: the first tank is burned first and filled last"""
+        self.tanks = tanks
+        self.names = [tank.name for tank in tanks]
+
+        # Filling order, the reverse of the burn order
+        filling = tanks[::-1]
+        self.xcg = np.stack(np.broadcast_arrays(*(np.asarray(tank.xcg, dtype=float) for tank in filling)), axis=-1)
+        self.capacity = np.stack(np.broadcast_arrays(*(np.asarray(tank.capacity, dtype=float) for tank in filling)),
+                                 axis=-1)
+        self.filled_before = np.cumsum(self.capacity, axis=-1) - self.capacity
+        self.total = self.capacity.sum(axis=-1)
+
+    def contents(self, fuel):
+        """Returns the fuel [kg] in each tank, in burn order along the last axis, with fuel [kg] on board
+
+        Fuel beyond the total capacity is not held by any tank.
+        """
+        fuel = np.asarray(fuel, dtype=float)[..., np.newaxis]
+        return np.clip(fuel - self.filled_before, 0, self.capacity)[..., ::-1]
+
+    def moment(self, fuel):
+        """Returns the fuel mass [kg] times its c.g. (x/mac) with fuel [kg] on board"""
+        fuel = np.asarray(fuel, dtype=float)[..., np.newaxis]
+        return (np.clip(fuel - self.filled_before, 0, self.capacity) * self.xcg).sum(axis=-1)
+
+    def fueling_order(self, fuel=None):
+        """Returns the c.g. (x/mac) and mass of the tank fills when fueling fuel [kg], all the tanks by default"""
+        fuel = self.total if fuel is None else fuel
+        mass = np.clip(np.asarray(fuel, dtype=float)[..., np.newaxis] - self.filled_before, 0, self.capacity)
+        return np.broadcast_arrays(self.xcg, mass)
+
+
+def burned(t, durations, flows):
+    """Returns the fuel burned [kg] at the times t of missions made of consecutive phases
+
+    args:
+        t (array): times from the start of the mission [min]
+        durations (array): duration of each phase [min], phases along the last axis and missions before it
+        flows (array): fuel flow of each phase [kg/min], broadcast against durations
+
+    returns:
+        array: fuel burned of shape (..., len(t))
+    """
+    durations, flows = np.broadcast_arrays(np.asarray(durations, dtype=float), np.asarray(flows, dtype=float))
+    starts = np.cumsum(durations, axis=-1) - durations
+    elapsed = np.asarray(t, dtype=float)[:, np.newaxis] - starts[..., np.newaxis, :]
+    return (np.clip(elapsed, 0, durations[..., np.newaxis, :]) * flows[..., np.newaxis, :]).sum(axis=-1)
+
+
+def trajectory(system, xcg_zfw, mass_zfw, fuel, t, durations, flows):
+    """Returns the c.g. and mass over the time grid of a batch of missions
+
+    args:
+        system (FuelSystem): tanks and burn sequence
+        xcg_zfw, mass_zfw (float or array): zero fuel c.g. (x/mac) and mass [kg] of each mission
+        fuel (float or array): fuel on board at the start [kg]
+        t, durations, flows: time grid [min] and phases, see burned
+
+    returns:
+        dict: 't', 'fuel' on board, 'contents' of the tanks (..., len(t), n_tanks), 'mass' and 'xcg' of shape
+        (..., len(t)), and 'exhausted' True where the schedule burns more fuel than is on board
+    """
+    demand = np.asarray(fuel, dtype=float)[..., np.newaxis] - burned(t, durations, flows)
+    on_board = np.maximum(demand, 0)
+
+    mass_zfw = np.asarray(mass_zfw, dtype=float)[..., np.newaxis]
+    moment_zfw = mass_zfw * np.asarray(xcg_zfw, dtype=float)[..., np.newaxis]
+    mass = mass_zfw + on_board
+    xcg = (moment_zfw + system.moment(on_board)) / mass
+
+    return {
+        't': np.asarray(t, dtype=float),
+        'fuel': on_board,
+        'contents': system.contents(on_board),
+        'mass': mass,
+        'xcg': xcg,
+        'exhausted': demand < 0,
+    }
+
+
+def check_envelope(trajectory, envelope, max_mass):
+    """Returns where the trajectories leave the loading envelope
+
+    args:
+        trajectory (dict): as returned by trajectory
+        envelope (tuple): (min_xcg, max_xcg) limits
+        max_mass (float): maximum mass [kg]
+
+    returns:
+        dict: 'forward', 'aft' and 'overweight' masks over the time grid, 'within' True for the missions that stay
+        inside the envelope with fuel on board throughout, and 'first' index of the first violating time (-1 if none)
+    """
+    min_xcg, max_xcg = envelope
+    forward = trajectory['xcg'] < min_xcg
+    aft = trajectory['xcg'] > max_xcg
+    overweight = trajectory['mass'] > max_mass
+
+    violation = forward | aft | overweight | trajectory['exhausted']
+    within = ~violation.any(axis=-1)
+    return {
+        'forward': forward,
+        'aft': aft,
+        'overweight': overweight,
+        'within': within,
+        'first': np.where(within, -1, violation.argmax(axis=-1)),
+    }
+
+
+def main():
+    from loading import Loading
+
+    loading = Loading('NewData.csv', mac=3.17, change=0.6)
+    diagram = loading.loading_diagram()
+    fuel_max = loading.data['fuel_max']
+
+    # Centre tank burned first, then the inner and outer wing tanks
+    system = FuelSystem([
+        Tank('centre', 0.05, 0.2 * fuel_max),
+        Tank('inner', 0.35, 0.5 * fuel_max),
+        Tank('outer', 0.75, 0.3 * fuel_max),
+    ])
+
+    # Taxi, climb, cruise, descent and taxi of missions with random cruise times and zero fuel states
+    n = 5000
+    rng = np.random.default_rng(0)
+    cruise = rng.uniform(30, 240, n)
+    durations = np.stack(np.broadcast_arrays(10, 20, cruise, 25, 5), axis=-1)
+    flows = np.array([10, 45, 28, 12, 10])
+    fuel = np.minimum((durations * flows).sum(axis=-1) + 1500, fuel_max)  # Trip fuel and reserves
+
+    mass_zfw = rng.uniform(loading.data['OEW'], diagram['mzfw'], n)
+    xcg_zfw = rng.uniform(diagram['min_xcg'], diagram['max_xcg'], n)
+
+    t = np.arange(0, 301, 1.0)
+    path = trajectory(system, xcg_zfw, mass_zfw, fuel, t, durations, flows)
+    check = check_envelope(path, (diagram['min_xcg'], diagram['max_xcg']), loading.data['ramp_mass'])
+
+    print(f"{check['within'].sum()} of {n} missions inside the envelope, "
+          f"{check['forward'].any(axis=-1).sum()} forward and {check['aft'].any(axis=-1).sum()} aft of the limits")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,231 @@
 import csv
+import functools
+import hashlib
+import logging
+import os
+import pickle
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 
+import numpy as np
 
-def load_data(file_name):
-    """Returns csv data"""
+from parameters import Parameters
+
+
+logging.getLogger('aircraft').addHandler(logging.NullHandler())
+
+_parameters = {}  # Parsed data files shared by the whole process: absolute path -> ((mtime, size), parameters)
+_memo_observer = None  # Called as _memo_observer(name, hit) by memoized methods, see set_memo_observer
+
+
+def parse_data(file_name):
+    """Returns the variables of a csv data file, checking that each one is a finite number defined once"""
     data = {}
     with open(file_name, newline='') as csvfile:
         reader = csv.reader(csvfile, delimiter=',', quotechar='|')
         for row in reader:
             if len(row) == 2:
                 variable, value = row
-                data[variable] = float(value)
+                try:
+                    value = float(value)
+                except ValueError:
+                    raise ValueError(f"{file_name}:{reader.line_num}: '{variable}' is not a number: {value!r}")
+                if not np.isfinite(value):
+                    raise ValueError(f"{file_name}:{reader.line_num}: '{variable}' is not finite")
+                if variable in data:
+                    raise ValueError(f"{file_name}:{reader.line_num}: '{variable}' is defined twice")
+                data[variable] = value
     return data
 
 
+def _file_hash(file_name):
+    with open(file_name, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _read_cache(cache_file, stamp, file_name):
+    """Returns the cached data if the cache matches the file's (mtime, size) or content hash"""
+    try:
+        with open(cache_file, 'rb') as f:
+            cache = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+
+    if cache.get('stamp') == stamp:
+        return cache['data']
+    if cache.get('sha256') == _file_hash(file_name):
+        _write_cache(cache_file, stamp, cache['sha256'], cache['data'])
+        return cache['data']
+    return None
+
+
+def _write_cache(cache_file, stamp, sha256, data):
+    os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+    tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+    with open(tmp_file, 'wb') as f:
+        pickle.dump({'stamp': stamp, 'sha256': sha256, 'data': data}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_file, cache_file)
+
+
+def load_parameters(file_name, cache_dir=None):
+    """Returns the csv data as read-only Parameters, parsed and validated once per process and shared by every caller
+
+    The file is parsed again only when its modification time or size changes. A missing or out-of-range parameter
+    raises ValueError here, before any model is built.
+
+    args:
+        file_name (str): csv data file
+        cache_dir (str): optional directory for a binary copy of the parsed file, reused across processes while the
+            file's (mtime, size) or content hash matches
+    """
+    path = os.path.abspath(file_name)
+    status = os.stat(path)
+    stamp = (status.st_mtime_ns, status.st_size)
+
+    entry = _parameters.get(path)
+    if entry is not None and entry[0] == stamp:
+        return entry[1]
+
+    data = None
+    if cache_dir is not None:
+        cache_file = os.path.join(cache_dir, hashlib.sha1(path.encode()).hexdigest() + '.pickle')
+        data = _read_cache(cache_file, stamp, path)
+
+    if data is None:
+        data = parse_data(path)
+        if cache_dir is not None:
+            _write_cache(cache_file, stamp, _file_hash(path), data)
+
+    parameters = Parameters(data, source=path)
+    _parameters[path] = (stamp, parameters)
+    return parameters
+
+
+def load_data(file_name):
+    """Returns csv data as a new dictionary that the caller may modify"""
+    return dict(load_parameters(file_name).items())
+
+
+def fingerprint(data, keys, content=False):
+    """Returns a hashable stamp of the data values stored under keys
+
+    Arrays are stamped in O(1) by identity, buffer address, shape, strides and dtype, so an array modified in place
+    keeps its stamp: assign a new array to change an input. With content=True arrays are stamped by a hash of their
+    buffer, dtype and shape instead, equal for equal arrays held by different objects.
+    """
+    stamp = []
+    for key in keys:
+        value = data.get(key)
+        if isinstance(value, np.ndarray):
+            if content:
+                digest = hashlib.blake2b(np.ascontiguousarray(value).data, digest_size=16).digest()
+                stamp.append((value.shape, value.dtype.str, digest))
+            else:
+                stamp.append((id(value), value.__array_interface__['data'][0], value.shape, value.strides,
+                              value.dtype.str))
+        else:
+            stamp.append(value)
+    return tuple(stamp)
+
+
+def set_memo_observer(observer):
+    """Sets the function called as observer(name, hit) on every memoized call, None to stop reporting"""
+    global _memo_observer
+    _memo_observer = observer
+
+
+def memoized(*keys):
+    """Caches a method result per argument tuple
+
+    The cached value is reused while the entries of self.data listed in keys are unchanged, so assigning a new value to
+    any of the inputs a derivation depends on invalidates it automatically. Arrays are compared by identity (see
+    fingerprint) and must not be modified in place.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args):
+            cache = self.__dict__.setdefault('_cache', {})
+            key = (method.__name__,) + args
+            stamp = fingerprint(self.data, keys)
+
+            entry = cache.get(key)
+            hit = entry is not None and entry[0] == stamp
+            if _memo_observer is not None:
+                _memo_observer(method.__qualname__, hit)
+            if hit:
+                return entry[1]
+
+            value = method(self, *args)
+            # The inputs are kept alive with the entry, so the ids in its stamp cannot be reused by other arrays
+            cache[key] = (stamp, value, [self.data.get(k) for k in keys])
+            return value
+
+        wrapper.keys = keys
+        return wrapper
+
+    return decorator
+
+
+def parallel_map(function, tasks, workers=None, max_pending=None):
+    """Yields function(*task) for every task, running them on a process pool
+
+    Results come back as they complete, not in task order. At most max_pending tasks are queued at a time (twice the
+    worker count by default), so arbitrarily long task generators run in bounded memory. With workers=0 the tasks run
+    in the calling process.
+    """
+    if workers == 0:
+        for task in tasks:
+            yield function(*task)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        max_pending = max_pending or 2 * (workers or os.cpu_count() or 1)
+        pending = set()
+        for task in tasks:
+            pending.add(executor.submit(function, *task))
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+
+        for future in pending:
+            yield future.result()
+
+
+def get_logger(name):
+    """Returns the diagnostics logger of a module, silent unless enabled with trace()"""
+    return logging.getLogger(f'aircraft.{name}')
+
+
+def trace(enabled=True, stream=None, level=logging.DEBUG):
+    """Turns the diagnostic output of the intermediate results on or off
+
+    args:
+        enabled (bool): whether the diagnostics are written
+        stream: file-like object receiving them, stderr by default
+        level (int): lowest logging level that is written
+    """
+    logger = logging.getLogger('aircraft')
+    for handler in [h for h in logger.handlers if getattr(h, 'trace', False)]:
+        logger.removeHandler(handler)
+
+    if enabled:
+        handler = logging.StreamHandler(stream)
+        handler.setFormatter(logging.Formatter('%(name)s: %(message)s'))
+        handler.trace = True
+        logger.addHandler(handler)
+        logger.setLevel(level)
+    else:
+        logger.setLevel(logging.NOTSET)
+
+
+def pyplot():
+    """Returns matplotlib.pyplot, imported on first use so compute-only runs never load matplotlib"""
+    import matplotlib.pyplot as plt
+    return plt
+
+
 def main():
-    data = load_data()
+    data = load_data('data.csv')
     print(data)
 
 
@@ -0,0 +1,180 @@
+"""Opt-in call counters and timing spans for the public methods of the aircraft classes
+
+The classes are only patched while instrumentation is enabled, so there is no cost when it is off. Memoized methods
+also report whether each call reused the cached value (a hit) or recomputed it (a miss):
+
+    profiler = instrument.enable()
+    Stabcont('data.csv').scissorplot()
+    instrument.disable()
+    profiler.write_profile('profile.csv')
+    profiler.write_trace('trace.json')  # Open in chrome://tracing or Perfetto
+"""
+import contextlib
+import csv
+import functools
+import json
+import os
+import time
+
+from cg_calculation import CenterOfGravity
+from helpers import set_memo_observer
+from loading import Loading
+from Stabcont import Stabcont
+
+CLASSES = [CenterOfGravity, Loading, Stabcont]
+
+_patched = {}  # (class, attribute name) -> original attribute
+
+
+class Profiler:
+
+    def __init__(self, max_events=1_000_000):
+        """Collects call counts, cumulative and own time per method, memo hits and misses, and the nested spans of
+        every call
+
+        args:
+            max_events (int): spans kept for the trace, later ones are only counted in the profile
+        """
+        self.stats = {}  # name -> [calls, total time, own time]
+        self.memo = {}  # name -> [hits, misses] of the memoized methods
+        self.events = []  # (name, start, duration, depth)
+        self.max_events = max_events
+        self.dropped_events = 0
+        self.stack = []  # [name, start, time spent in children]
+        self.origin = time.perf_counter()
+
+    def wrap(self, name, function):
+        """Returns function wrapped so that each call is recorded as a span called name"""
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            frame = [name, time.perf_counter(), 0.0]
+            self.stack.append(frame)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                end = time.perf_counter()
+                self.stack.pop()
+                self.record(name, frame[1], end - frame[1], frame[2])
+
+        return wrapper
+
+    def record(self, name, start, duration, children):
+        stats = self.stats.setdefault(name, [0, 0.0, 0.0])
+        stats[0] += 1
+        stats[1] += duration
+        stats[2] += duration - children
+
+        if self.stack:
+            self.stack[-1][2] += duration
+
+        if len(self.events) < self.max_events:
+            self.events.append((name, start, duration, len(self.stack)))
+        else:
+            self.dropped_events += 1
+
+    def record_memo(self, name, hit):
+        """Counts a call of the memoized method name as a hit or a miss (the value was recomputed)"""
+        counts = self.memo.setdefault(name, [0, 0])
+        counts[0 if hit else 1] += 1
+
+    def reset(self):
+        self.stats.clear()
+        self.memo.clear()
+        self.events.clear()
+        self.dropped_events = 0
+        self.origin = time.perf_counter()
+
+    def profile(self):
+        """Returns the flat profile as a list of dictionaries sorted by cumulative time
+
+        'hits' and 'misses' count the calls of memoized methods that reused or recomputed their value, and are None
+        for the other methods.
+        """
+        rows = [{'name': name, 'calls': calls, 'hits': self.memo.get(name, [None, None])[0],
+                 'misses': self.memo.get(name, [None, None])[1], 'total_s': total, 'own_s': own,
+                 'per_call_s': total / calls}
+                for name, (calls, total, own) in self.stats.items()]
+        return sorted(rows, key=lambda row: row['total_s'], reverse=True)
+
+    def print(self):
+        print(f"{'Method':<40} {'Calls':>8} {'Hits':>8} {'Misses':>8} {'Total [ms]':>12} {'Own [ms]':>12} "
+              f"{'Per call [us]':>14}")
+        for row in self.profile():
+            hits, misses = ('-', '-') if row['hits'] is None else (row['hits'], row['misses'])
+            print(f"{row['name']:<40} {row['calls']:>8} {hits:>8} {misses:>8} {row['total_s'] * 1e3:>12.3f} "
+                  f"{row['own_s'] * 1e3:>12.3f} {row['per_call_s'] * 1e6:>14.2f}")
+
+    def write_profile(self, file_name):
+        """Writes the flat profile as csv"""
+        with open(file_name, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=['name', 'calls', 'hits', 'misses', 'total_s', 'own_s',
+                                                   'per_call_s'])
+            writer.writeheader()
+            writer.writerows(self.profile())
+
+    def write_trace(self, file_name):
+        """Writes the spans in the Chrome trace event format"""
+        pid = os.getpid()
+        events = [{'name': name, 'ph': 'X', 'ts': (start - self.origin) * 1e6, 'dur': duration * 1e6,
+                   'pid': pid, 'tid': 0, 'args': {'depth': depth}}
+                  for name, start, duration, depth in self.events]
+        with open(file_name, 'w') as f:
+            json.dump({'traceEvents': events, 'otherData': {'dropped_events': self.dropped_events}}, f)
+
+
+def public_methods(cls):
+    """Yields the names of the public methods defined on cls, skipping properties"""
+    for name, attribute in vars(cls).items():
+        if name.startswith('_') and name != '__init__':
+            continue
+        if isinstance(attribute, (staticmethod, classmethod)) or callable(attribute):
+            yield name
+
+
+def enable(classes=None, profiler=None):
+    """Patches the public methods (and __init__) of the classes and returns the profiler recording them"""
+    profiler = profiler or Profiler()
+    disable()
+
+    for cls in classes or CLASSES:
+        for name in list(public_methods(cls)):
+            attribute = vars(cls)[name]
+            span = f'{cls.__name__}.{name}'
+            if isinstance(attribute, (staticmethod, classmethod)):
+                wrapped = type(attribute)(profiler.wrap(span, attribute.__func__))
+            else:
+                wrapped = profiler.wrap(span, attribute)
+
+            _patched[(cls, name)] = attribute
+            setattr(cls, name, wrapped)
+
+    set_memo_observer(profiler.record_memo)
+    return profiler
+
+
+def disable():
+    """Restores the original methods and stops the memo reports"""
+    set_memo_observer(None)
+    for (cls, name), attribute in _patched.items():
+        setattr(cls, name, attribute)
+    _patched.clear()
+
+
+@contextlib.contextmanager
+def profiled(classes=None):
+    """Context manager yielding a profiler that records the classes inside the block"""
+    profiler = enable(classes)
+    try:
+        yield profiler
+    finally:
+        disable()
+
+
+def main():
+    with profiled() as profiler:
+        Stabcont('data.csv').required_tail()
+    profiler.print()
+
+
+if __name__ == "__main__":
+    main()
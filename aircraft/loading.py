@@ -1,199 +1,321 @@
 """Creates the aircraft's loading diagram"""
-import matplotlib.pyplot as plt
+import warnings
+
 import numpy as np
 
+from cabin import CabinLayout
 from cg_calculation import CenterOfGravity
-from helpers import load_data
+from fuel import FuelSystem, Tank
+from helpers import get_logger, load_parameters, pyplot
+
+logger = get_logger('loading')
+
+SEAT_LETTERS = 'ABCDEFGHJK'
+
+
+def cumulative_cg(xcg_start, mass_start, xcg_items, mass_items):
+    """Returns the c.g. and mass after each item of one or many loading sequences
+
+    args:
+        xcg_start, mass_start (float or array): c.g. and mass before loading, broadcast against the sequences
+        xcg_items, mass_items (array): c.g. and mass of the items in loading order along the last axis
+
+    returns:
+        xcg, mass (array): running c.g. and mass with the starting point first, shape (..., n_items + 1)
+    """
+    xcg_items, mass_items = np.broadcast_arrays(np.asarray(xcg_items, dtype=float),
+                                                np.asarray(mass_items, dtype=float))
+    mass_start = np.asarray(mass_start, dtype=float)[..., np.newaxis]
+    moment_start = mass_start * np.asarray(xcg_start, dtype=float)[..., np.newaxis]
+
+    zero = np.zeros(xcg_items.shape[:-1] + (1,))
+    moment = moment_start + np.concatenate([zero, np.cumsum(mass_items * xcg_items, axis=-1)], axis=-1)
+    mass = mass_start + np.concatenate([zero, np.cumsum(mass_items, axis=-1)], axis=-1)
+
+    return moment / mass, mass
+
+
+def _last_axis(value):
+    return np.asarray(value, dtype=float)[..., np.newaxis]
+
+
+def _join(parts):
+    """Concatenates arrays along the last axis, broadcasting the leading (design) axes"""
+    shape = np.broadcast_shapes(*(np.shape(part)[:-1] for part in parts))
+    return np.concatenate([np.broadcast_to(part, shape + np.shape(part)[-1:]) for part in parts], axis=-1)
+
+
+# The loading stations below take the aircraft data, whose values may be arrays of designs. The designs become the
+# leading axes of the results and the stations the last one.
+
+def cargo_arms(data):
+    """Returns the c.g. (x/mac) and mass of the front and aft cargo compartments"""
+    XLEMAC = _last_axis(data['XLEMAC'])
+    mac = _last_axis(data['mac'])
+
+    xcg = (np.array([8.44, 16.88]) - XLEMAC) / mac
+    mass = np.stack(np.broadcast_arrays(data['front_cargo_w'], data['aft_cargo_w']), axis=-1).astype(float)
+    return xcg, mass
+
+
+def seat_arms(data, n_seats):
+    """Returns the c.g. (x/mac) of the n_seats rows of the default cabin, CabinLayout.single_class, front to back"""
+    return CabinLayout.single_class(data, n_seats).row_arms(data)
+
+
+def fuel_arm(data):
+    """Returns the c.g. (x/mac) and mass of the fuel"""
+    xcg_fuel = 0.8  # cg fuel is equal to cg fuel tank TODO: get real data
+    mass_fuel = data['fuel_max']  # TODO: get real data (done)
+    return xcg_fuel, mass_fuel
+
+
+def loading_orders(data, n_seats, mass_pax, n_columns=3, cabin=None, boarding=('window', 'aisle', 'middle'),
+                   fuel=None):
+    """Returns the items of the front-first and aft-first loading orders of Loading.get_cg_shift
+
+    Cargo, the seats of each kind in the boarding order and the fuel are loaded one after the other, all front to back
+    or all back to front. As every group ends at the same state in both orders, the two orders pass through every
+    point of the loading diagram. The cabin is by default CabinLayout.single_class with n_seats rows of n_columns
+    seats. With a FuelSystem, its tanks are filled one by one instead of the single fuel item.
+
+    returns:
+        xcg, mass (array): c.g. (x/mac) and mass of the items, shape (..., 2, n_items)
+        in_fuselage (array): True for the items carried by the fuselage, False for the fuel
+    """
+    xcg_cargo, mass_cargo = cargo_arms(data)
+    if fuel is None:
+        xcg_fuel, mass_fuel = fuel_arm(data)
+        mass_fuel = _last_axis(mass_fuel)
+        xcg_fuel = np.full(mass_fuel.shape, xcg_fuel)
+    else:
+        xcg_fuel, mass_fuel = fuel.fueling_order()
+
+    if cabin is None:
+        cabin = CabinLayout.single_class(data, n_seats, SEAT_LETTERS[:n_columns] + '|')
+    xcg_pax, mass_pax = cabin.boarding_orders(data, mass_pax, boarding)
+    xcg_pax, mass_pax = np.moveaxis(xcg_pax, -2, 0), np.moveaxis(mass_pax, -2, 0)
+
+    xcg = np.stack([
+        _join([xcg_cargo, xcg_pax[0], xcg_fuel]),
+        _join([xcg_cargo[..., ::-1], xcg_pax[1], xcg_fuel]),
+    ], axis=-2)
+    mass = np.stack([
+        _join([mass_cargo, mass_pax[0], mass_fuel]),
+        _join([mass_cargo[..., ::-1], mass_pax[1], mass_fuel]),
+    ], axis=-2)
+    xcg, mass = np.broadcast_arrays(xcg, mass)
+    in_fuselage = np.arange(xcg.shape[-1]) < xcg.shape[-1] - np.shape(xcg_fuel)[-1]
+
+    return xcg, mass, in_fuselage
 
 
 class Loading:
+    n_seats = 17  # Number of seats in a single column of the default cabin
+    boarding = ('window', 'aisle', 'middle')  # Order in which the seat kinds board
+    mass_average_pax = 92
+    capacity = 128  # Number of loading history points preallocated
 
     # def __init__(self, file_name='NewData.csv'):
-    def __init__(self, file_name='data.csv', mac=1, change=0):
-        self.data = load_data(file_name)
+    def __init__(self, file_name='data.csv', mac=1, change=0, data=None, cabin=None, fuel=None):
+        # Read-only, shared with every other user of the file, or the given data of a design variant
+        self.data = load_parameters(file_name) if data is None else data
 
         # Get cg at oew:
-        CG = CenterOfGravity()
-        print(CG.cg)
+        CG = CenterOfGravity(file_name, data=data)
         xcg_oew = (CG.cg * mac - change) / mac
-        print(xcg_oew)
-        self.xcg = [xcg_oew]  # assumed to be 0.25c we can update this later in more detail if we find another way
-        self.mass = [self.data['OEW']]
+        logger.debug('xcg oew=%s shifted=%s', CG.cg, xcg_oew)
+        self.xcg_oew = xcg_oew  # assumed to be 0.25c we can update this later in more detail if we find another way
 
-    def get_new_xcg(self, xcg_old, mass_old, xcg_item, mass_item):
-        """Returns the new mass and c.g. after an item is added"""
-        xcg_old = xcg_old
-        mass_old = mass_old
+        # Cabin layout, the single class cabin of n_seats rows unless given
+        self.cabin = cabin
+        self._default_cabin = None
 
-        mass_new = mass_item + mass_old
-        xcg_new = (mass_old * xcg_old + mass_item * xcg_item) / mass_new
+        # Fuel tanks, a single tank at the fuel arm unless given
+        self.fuel = fuel
 
-        self.xcg.append(xcg_new)
-        self.mass.append(mass_new)
+        # Loading history as rows of (xcg, mass), the first row is the operational empty weight
+        self.history = np.empty((self.capacity, 2))
+        self.reset()
 
-        return xcg_new, mass_new
+    @property
+    def xcg(self):
+        return self.history[:self.n_points, 0]
 
-    def load_cargo(self):
-        """Shift the c.g. by loading the two cargo compartments"""
-        xcg_old = self.xcg[-1]
-        mass_old = self.mass[-1]
+    @property
+    def mass(self):
+        return self.history[:self.n_points, 1]
+
+    def reset(self):
+        """Clears the loading history back to the operational empty weight"""
+        self.history[0] = self.xcg_oew, self.data['OEW']
+        self.n_points = 1
 
-        XLEMAC = self.data['XLEMAC']
-        mac = self.data['mac']
+    def record(self, xcg, mass):
+        """Appends one or more (xcg, mass) points to the loading history"""
+        xcg, mass = np.ravel(xcg), np.ravel(mass)
+        n_points = self.n_points + len(xcg)
 
-        xcg_cargo_f = (8.44 - XLEMAC) / mac
-        mass_cargo_f = self.data['front_cargo_w']
+        if n_points > len(self.history):
+            history = np.empty((max(n_points, 2 * len(self.history)), 2))
+            history[:self.n_points] = self.history[:self.n_points]
+            self.history = history
 
-        xcg_cargo_aft = (16.88 - XLEMAC) / mac
-        mass_cargo_aft = self.data['aft_cargo_w']
+        self.history[self.n_points:n_points, 0] = xcg
+        self.history[self.n_points:n_points, 1] = mass
+        self.n_points = n_points
+
+    def get_new_xcg(self, xcg_old, mass_old, xcg_item, mass_item):
+        """Returns the new mass and c.g. after an item is added"""
+        mass_new = mass_item + mass_old
+        xcg_new = (mass_old * xcg_old + mass_item * xcg_item) / mass_new
 
-        xcg_f, mass_f = self.get_new_xcg(xcg_old, mass_old, xcg_cargo_f, mass_cargo_f)
-        xcg_aft, mass_aft = self.get_new_xcg(xcg_old, mass_old, xcg_cargo_aft, mass_cargo_aft)
-        xcg_end, mass_end = self.get_new_xcg(xcg_f, mass_f, xcg_cargo_aft, mass_cargo_aft)
+        self.record(xcg_new, mass_new)
 
-        xcg_list_f = [xcg_old, xcg_f, xcg_end]
-        mass_list_f = [mass_old, mass_f, mass_end]
+        return xcg_new, mass_new
 
-        xcg_list_aft = [xcg_old, xcg_aft, xcg_end]
-        mass_list_aft = [mass_old, mass_aft, mass_end]
+    def load_sequences(self, xcg_items, mass_items):
+        """Loads one or many item sequences (last axis) from the current state and records every point reached"""
+        xcg_old, mass_old = self.history[self.n_points - 1]
+        xcg, mass = cumulative_cg(xcg_old, mass_old, xcg_items, mass_items)
 
-        return xcg_list_f, mass_list_f, xcg_list_aft, mass_list_aft
+        self.record(xcg[..., 1:], mass[..., 1:])
 
-    def load_seats(self, gap=0):
-        """Shift the c.g. by loading the passengers
+        return xcg, mass
 
-        args
-            gap (int): Number of seats that are skipped in a single column
-        """
+    def cargo_arms(self):
+        """Returns the c.g. (x/mac) and mass of the front and aft cargo compartments"""
+        return cargo_arms(self.data)
 
-        XLEMAC = self.data['XLEMAC']
-        mac = self.data['mac']
-        dist_seats = self.data['dist_seats']
+    def get_cabin(self):
+        """Returns the cabin layout, by default CabinLayout.single_class with n_seats rows"""
+        if self.cabin is not None:
+            return self.cabin
+        if self._default_cabin is None or self._default_cabin.n_rows != self.n_seats:
+            self._default_cabin = CabinLayout.single_class(self.data, self.n_seats)
+        return self._default_cabin
 
-        n_seats = 17  # Number os seats in a single column
+    def seat_arms(self):
+        """Returns the c.g. (x/mac) of the cabin rows, front to back"""
+        return self.get_cabin().row_arms(self.data)
 
-        x_seats_f = (2.4 / 11.3 * 26.50)  # Initial seat c.g.
-        x_seats_aft = x_seats_f + dist_seats * n_seats  # Final seat c.g.
+    def fuel_arm(self):
+        """Returns the c.g. (x/mac) and mass of the fuel"""
+        return fuel_arm(self.data)
 
-        x_cg_f = (np.linspace(x_seats_f, x_seats_aft, n_seats) - XLEMAC) / mac
-        x_cg_aft = (np.linspace(x_seats_aft, x_seats_f, n_seats) - XLEMAC) / mac
+    def get_fuel_system(self):
+        """Returns the fuel system, by default a single tank holding fuel_max at the fuel arm"""
+        if self.fuel is not None:
+            return self.fuel
+        return FuelSystem([Tank('fuel', *self.fuel_arm())])
 
-        mass_average_pax = 92
-        xcg_old = self.xcg[-1]
-        mass_old = self.mass[-1]
+    def loading_orders(self):
+        """Returns the items of the front-first and aft-first loading orders of get_cg_shift, see loading_orders"""
+        return loading_orders(self.data, self.n_seats, self.mass_average_pax, cabin=self.get_cabin(),
+                              boarding=self.boarding, fuel=self.get_fuel_system())
 
-        def load_passengers(x_cg_pax_list):
-            """Add passengers and shift the c.g."""
-            xcg_list = [xcg_old]
-            mass_list = [mass_old]
+    def load_cargo(self):
+        """Shift the c.g. by loading the two cargo compartments"""
+        xcg_cargo, mass_cargo = self.cargo_arms()
 
-            for x_cg_pax in x_cg_pax_list:
-                if x_cg_pax > gap_xcg:  # When one of the columns have a gap
-                    xcg, mass = self.get_new_xcg(xcg_list[-1], mass_list[-1], x_cg_pax, mass_average_pax)
-                else:
-                    # Load first and second passenger at same xcg
-                    _, _ = self.get_new_xcg(xcg_list[-1], mass_list[-1], x_cg_pax, mass_average_pax)
-                    xcg, mass = self.get_new_xcg(xcg_list[-1], mass_list[-1], x_cg_pax, mass_average_pax)
+        # Front compartment first and aft compartment first
+        xcg, mass = self.load_sequences([xcg_cargo, xcg_cargo[::-1]], [mass_cargo, mass_cargo[::-1]])
 
-                xcg_list.append(xcg)
-                mass_list.append(mass)
+        return xcg[0], mass[0], xcg[1], mass[1]
 
-            return xcg_list, mass_list
+    def load_seats(self, kind='window', gap=None):
+        """Shift the c.g. by loading the passengers
 
-        gap_xcg = x_cg_f[n_seats - gap - 1]  # Used to determine the c.g. position where a column with a gap stops
+        args
+            kind (str): seats that are loaded, 'window', 'middle' or 'aisle'
+            gap (int): deprecated, the seats skipped in a column. gap=2 loaded the aisle seats and no gap the others.
+        """
+        if isinstance(kind, int):  # load_seats(gap) positionally
+            kind, gap = 'window', kind
+        if gap is not None:
+            warnings.warn("load_seats(gap=...) is deprecated, use load_seats(kind=...)", DeprecationWarning,
+                          stacklevel=2)
+            kind = 'aisle' if gap else 'window'
 
-        xcg_list_f, mass_list_f = load_passengers(x_cg_f)
-        xcg_list_aft, mass_list_aft = load_passengers(x_cg_aft, )
+        # Front to back and back to front
+        xcg_pax, mass_pax = self.get_cabin().boarding_orders(self.data, self.mass_average_pax, [kind])
+        xcg, mass = self.load_sequences(xcg_pax, mass_pax)
 
-        return xcg_list_f, mass_list_f, xcg_list_aft, mass_list_aft
+        return xcg[0], mass[0], xcg[1], mass[1]
 
     def load_fuel(self):
-        """Shift the c.g. by loading the fuel tanks"""
-        xcg_old = self.xcg[-1]
-        mass_old = self.mass[-1]
+        """Shift the c.g. by loading the fuel tanks, in the reverse of their burn order"""
+        xcg_fuel, mass_fuel = self.get_fuel_system().fueling_order()
 
-        xcg_fuel = 0.8 # cg fuel is equal to cg fuel tank TODO: get real data
-        mass_fuel = self.data['fuel_max']  # TODO: get real data (done)
+        xcg, mass = self.load_sequences([xcg_fuel], [mass_fuel])
 
-        xcg_end, mass_end = self.get_new_xcg(xcg_old, mass_old, xcg_fuel, mass_fuel)
-
-        return [xcg_old, xcg_end], [mass_old, mass_end]
+        return xcg, mass
 
     def get_maxmincg(self):
         margin = 0.02
-        max_xcg, min_xcg = max(self.xcg) * (1 + margin), min(self.xcg) * (1 - margin)
-        # print("cg",self.xcg)
-        print("Check", min_xcg, max_xcg)
+        max_xcg, min_xcg = self.xcg.max() * (1 + margin), self.xcg.min() * (1 - margin)
+        logger.debug('xcg range min=%s max=%s', min_xcg, max_xcg)
         return min_xcg, max_xcg
 
-    def get_cg_shift(self, plot=True):
-        """Plot the loading diagram"""
+    def loading_diagram(self):
+        """Loads the aircraft in both orders and returns the lines of the loading diagram
 
-        # Define styles
-        cargo = {'c': '#003f5c', 'marker': 'o'}
-        window = {'c': '#58508d', 'marker': '+'}
-        aisle = {'c': '#bc5090', 'marker': '+'}
-        middle = {'c': '#ff6361', 'marker': '+'}
-        fuel = {'c': '#ffa600', 'marker': 's'}
+        returns:
+            dict: for 'cargo', 'window', 'aisle' and 'middle' the (xcg, mass) of the front-first and aft-first orders
+            as (xcg_f, mass_f, xcg_aft, mass_aft), for 'fuel' (xcg, mass), and the 'min_xcg' and 'max_xcg' limits
+            with margin, the 'min_mass' and 'max_mass' and the 'mzfw'
+        """
+        self.reset()
 
         # Get cargo xcg shift
-        xcg_cargo_f, mass_cargo_f, xcg_cargo_aft, mass_cargo_aft = self.load_cargo()
+        cargo = self.load_cargo()
 
-        # Get window seats xcg shift
-        xcg_window_f, mass_windows_f, xcg_window_aft, mass_windows_aft = self.load_seats()
-
-        # Get aisle seats xcg shift
-        xcg_aisle_f, mass_aisle_f, xcg_aisle_aft, mass_aisle_aft = self.load_seats(gap=2)
-
-        # Get middle seats xcg shift
-        xcg_middle_f, mass_middle_f, xcg_middle_aft, mass_middle_aft = self.load_seats()
+        # Get window, aisle and middle seats xcg shift, in boarding order
+        seats = {kind: self.load_seats(kind) for kind in self.boarding}
 
         # Get fuel xcg shift
-        xcg_fuel, mass_fuel = self.load_fuel()
-
-        # Find and plot maximum xcg shift
-        margin = 0.02
-        max_xcg, min_xcg = max(self.xcg) * (1 + margin), min(self.xcg) * (1 - margin)
-        max_mass, min_mass = max(self.mass), min(self.mass)
+        fuel = self.load_fuel()
+
+        # Find maximum xcg shift
+        min_xcg, max_xcg = self.get_maxmincg()
+
+        return {
+            'cargo': cargo,
+            **seats,
+            'fuel': fuel,
+            'min_xcg': min_xcg,
+            'max_xcg': max_xcg,
+            'min_mass': self.mass.min(),
+            'max_mass': self.mass.max(),
+            'mzfw': seats[self.boarding[-1]][1][-1],
+        }
+
+    def get_cg_shift(self, plot=True, verbose=None):
+        """Plot the loading diagram
+
+        args:
+            plot (bool): show the loading diagram
+            verbose (bool): print the results table, by default only when plotting
+        """
+        diagram = self.loading_diagram()
 
         # Print results
-        print('-' * 40)
-        print(f"{'Results':^40}")
-        print('-' * 40)
-        print(f"{'Maximum Xcg_mac':<25} {max_xcg:<8} {'[-]':<7}")
-        print(f"{'Minimum Xcg_mac':<25} {min_xcg:<8} {'[-]':<7}")
-        print(f"{'MZFW':<25} {mass_middle_f[-1]:<8} {'[kg]':<7}")
-        print(f"{'MTOW':<25} {max_mass:<8} {'[kg]':<7}")
-
-        # Add plot labels, title, legend
-        if plot:
-            # Create plot
-            fig, ax = plt.subplots()
-
-            l1, = ax.plot(xcg_cargo_f, mass_cargo_f, **cargo)
-            ax.plot(xcg_cargo_aft, mass_cargo_aft, **cargo)
-
-            l2, = ax.plot(xcg_window_f, mass_windows_f, **window)
-            ax.plot(xcg_window_aft, mass_windows_aft, **window)
+        if verbose is None:
+            verbose = plot
+        if verbose:
+            print('-' * 40)
+            print(f"{'Results':^40}")
+            print('-' * 40)
+            print(f"{'Maximum Xcg_mac':<25} {diagram['max_xcg']:<8} {'[-]':<7}")
+            print(f"{'Minimum Xcg_mac':<25} {diagram['min_xcg']:<8} {'[-]':<7}")
+            print(f"{'MZFW':<25} {diagram['mzfw']:<8} {'[kg]':<7}")
+            print(f"{'MTOW':<25} {diagram['max_mass']:<8} {'[kg]':<7}")
 
-            l3, = ax.plot(xcg_aisle_f, mass_aisle_f, **aisle)
-            ax.plot(xcg_aisle_aft, mass_aisle_aft, **aisle)
-
-            l4, = ax.plot(xcg_middle_f, mass_middle_f, **middle)
-            ax.plot(xcg_middle_aft, mass_middle_aft, **middle)
-
-            l5, = ax.plot(xcg_fuel, mass_fuel, **fuel)
-
-            ax.plot([max_xcg, max_xcg], [min_mass, max_mass], '--k', alpha=0.55)
-            ax.plot([min_xcg, min_xcg], [min_mass, max_mass], '--k', alpha=0.55)
+        if plot:
+            from plots import LoadingDiagram
 
-            fig.suptitle("Loading diagram", fontsize=16)
-            ax.set_xlabel(r'$X_{cg_{MAC}}$ [-]')
-            ax.set_ylabel(f'Mass [kg]')
-            ax.set_xlim(min_xcg * 0.8, max_xcg * 1.1)
-            plt.legend([l1, l2, l3, l4, l5],
-                       ['(1) Cargo', '(2) Window seats', '(3) Aisle seats', '(4) Middle seats', '(5) Fuel'])
-            plt.grid()
+            plt = pyplot()
+            LoadingDiagram(plt.figure()).update(diagram)
             plt.show()
 
     # def get_xcg_ac(self):
@@ -0,0 +1,196 @@
+"""Incremental load planning with running mass and moment"""
+import warnings
+
+from loading import Loading
+
+
+class LoadPlan:
+
+    def __init__(self, loading, n_columns=None, envelope=None):
+        """Load plan on the seat, cargo and fuel stations of a Loading instance
+
+        Every operation updates the running mass and moment, so adding, removing or moving an item, undoing it and
+        reading the c.g. all take constant time. The seats are those of Loading.get_cabin, blocked seats excluded, and
+        the fuel fills the tanks of Loading.get_fuel_system in their filling order.
+
+        args:
+            loading (Loading): aircraft whose stations and operational empty weight are used
+            n_columns (int): deprecated and ignored, the cabin layout defines the seats
+            envelope (tuple): (min_xcg, max_xcg) limits, by default the get_maxmincg limits of the loading diagram
+        """
+        if n_columns is not None:
+            warnings.warn("LoadPlan(n_columns=...) is deprecated and ignored, the seats are those of "
+                          "Loading.get_cabin()", DeprecationWarning, stacklevel=2)
+
+        # Seats by label ('12C') and by (row, column), row and column counted from 0 within the seat map of the zone
+        cabin = loading.get_cabin()
+        seat_xcg = cabin.seat_arms(loading.data)
+        self.seat_xcg = dict(zip(cabin.label.tolist(), seat_xcg.tolist()))
+        self.seat_labels = {}
+        for label, row, letter, zone in zip(cabin.label.tolist(), cabin.row.tolist(), cabin.letter.tolist(),
+                                            cabin.zone.tolist()):
+            letters, _ = cabin.zones[zone].seat_kinds()
+            self.seat_labels[(row, letters.index(letter))] = label
+
+        cargo_xcg, cargo_capacity = loading.cargo_arms()
+        self.hold_xcg = {'front': cargo_xcg[0], 'aft': cargo_xcg[1]}
+        self.hold_capacity = {'front': cargo_capacity[0], 'aft': cargo_capacity[1]}
+        self.fuel_system = loading.get_fuel_system()
+        self.fuel_capacity = float(self.fuel_system.total)
+
+        if envelope is None:
+            loading.get_cg_shift(plot=False)
+            envelope = loading.get_maxmincg()
+        self.envelope = envelope
+
+        self.mass = loading.data['OEW']
+        self.moment = self.mass * loading.xcg_oew
+
+        self.items = {}  # item id -> (kind, station, mass)
+        self.seats = {}  # seat label -> item id
+        self.hold_mass = {'front': 0.0, 'aft': 0.0}
+        self.history = []  # Per operation, the primitive actions that revert it
+        self._next_id = 0
+
+    @property
+    def xcg(self):
+        return self.moment / self.mass
+
+    def seat_label(self, *seat):
+        """Returns the label of a seat given as its label ('12C') or as (row, column)"""
+        label = seat[0] if len(seat) == 1 else self.seat_labels.get(tuple(seat))
+        if label not in self.seat_xcg:
+            raise ValueError(f"Seat {seat[0] if len(seat) == 1 else tuple(seat)} does not exist")
+        return label
+
+    def item_moment(self, kind, station, mass):
+        """Returns the moment (mass times x/mac) of an item, the fuel filling the tanks in their filling order"""
+        if kind == 'pax':
+            return mass * self.seat_xcg[station]
+        if kind == 'cargo':
+            return mass * self.hold_xcg[station]
+        return float(self.fuel_system.moment(mass))
+
+    def _insert(self, item_id, kind, station, mass):
+        if mass < 0 or (kind == 'pax' and mass == 0):
+            raise ValueError(f"{mass} kg is not a valid {kind} mass")
+        if kind == 'pax':
+            if station in self.seats:
+                raise ValueError(f"Seat {station} is taken by {self.seats[station]}")
+            self.seats[station] = item_id
+        elif kind == 'cargo':
+            if station not in self.hold_xcg:
+                raise ValueError(f"Unknown cargo hold '{station}'")
+            if self.hold_mass[station] + mass > self.hold_capacity[station]:
+                raise ValueError(f"{mass} kg exceeds the capacity left in the {station} hold")
+            self.hold_mass[station] += mass
+        elif mass > self.fuel_capacity:
+            raise ValueError(f"{mass} kg exceeds the fuel capacity of {self.fuel_capacity} kg")
+
+        self.items[item_id] = (kind, station, mass)
+        self.mass += mass
+        self.moment += self.item_moment(kind, station, mass)
+
+    def _delete(self, item_id):
+        kind, station, mass = self.items.pop(item_id)
+        if kind == 'pax':
+            del self.seats[station]
+        elif kind == 'cargo':
+            self.hold_mass[station] -= mass
+
+        self.mass -= mass
+        self.moment -= self.item_moment(kind, station, mass)
+        return kind, station, mass
+
+    def _apply(self, actions):
+        for action, item_id, *record in actions:
+            if action == 'insert':
+                self._insert(item_id, *record)
+            else:
+                self._delete(item_id)
+
+    def _new_id(self, kind):
+        self._next_id += 1
+        return f'{kind}{self._next_id}'
+
+    def add_passenger(self, *seat, mass=Loading.mass_average_pax):
+        """Seats a passenger on a seat given as its label ('12C') or as (row, column) and returns its item id"""
+        if len(seat) == 3:  # add_passenger(row, column, mass) positionally
+            *seat, mass = seat
+        item_id = self._new_id('pax')
+        self._insert(item_id, 'pax', self.seat_label(*seat), mass)
+        self.history.append([('delete', item_id)])
+        return item_id
+
+    def add_cargo(self, hold, mass):
+        """Loads cargo in the 'front' or 'aft' hold and returns its item id"""
+        item_id = self._new_id('cargo')
+        self._insert(item_id, 'cargo', hold, mass)
+        self.history.append([('delete', item_id)])
+        return item_id
+
+    def set_fuel(self, mass):
+        """Sets the fuel on board, the fuel has the item id 'fuel'"""
+        actions = []
+        if 'fuel' in self.items:
+            actions.append(('insert', 'fuel', *self._delete('fuel')))
+        try:
+            self._insert('fuel', 'fuel', None, mass)
+        except ValueError:
+            self._apply(actions)
+            raise
+        self.history.append([('delete', 'fuel')] + actions)
+
+    def remove(self, item_id):
+        """Offloads an item"""
+        record = self._delete(item_id)
+        self.history.append([('insert', item_id, *record)])
+
+    def move(self, item_id, *station):
+        """Moves a passenger to another seat, its label or (row, column), or cargo to another hold"""
+        if self.items[item_id][0] == 'pax':
+            new_station = self.seat_label(*station)
+        else:
+            new_station = station[0]
+        kind, old_station, mass = self._delete(item_id)
+        try:
+            self._insert(item_id, kind, new_station, mass)
+        except ValueError:
+            self._insert(item_id, kind, old_station, mass)
+            raise
+        self.history.append([('delete', item_id), ('insert', item_id, kind, old_station, mass)])
+
+    def undo(self):
+        """Reverts the last operation"""
+        if not self.history:
+            raise ValueError('nothing to undo')
+        self._apply(self.history.pop())
+
+    def check(self):
+        """Returns the c.g., mass and margins to the c.g. envelope"""
+        min_xcg, max_xcg = self.envelope
+        xcg = self.xcg
+        return {
+            'xcg': xcg,
+            'mass': self.mass,
+            'forward_margin': xcg - min_xcg,
+            'aft_margin': max_xcg - xcg,
+            'within': bool(min_xcg <= xcg <= max_xcg),
+        }
+
+
+def main():
+    plan = LoadPlan(Loading('NewData.csv', mac=3.17, change=0.6))
+    plan.add_cargo('front', 800)
+    for row in range(10):
+        plan.add_passenger(row, 0)
+    pax = plan.add_passenger(16, 2)
+    plan.move(pax, 0, 2)
+    plan.set_fuel(5000)
+    print(plan.check())
+    plan.undo()
+    print(plan.check())
+
+
+if __name__ == "__main__":
+    main()
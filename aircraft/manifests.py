@@ -0,0 +1,207 @@
+"""Streaming c.g. evaluation of passenger and cargo manifests
+
+A manifest is a csv file with a header and the columns:
+    flight      flight identifier, the rows of one flight must be consecutive
+    kind        'pax', 'bag' or 'cargo' (carried in a cargo hold) or 'fuel'
+    location    seat for passengers ('12C', a seat of the cabin layout, at most one passenger per flight), 'front' or
+                'aft' for bags and cargo, empty for fuel
+    mass        [kg], may be empty for passengers to use the standard passenger mass
+
+The fuel of a flight, the sum of its fuel rows, fills the tanks of the fuel system in their filling order.
+
+    python manifests.py archive/*.csv --data NewData.csv > flights.csv
+"""
+import argparse
+import csv
+import itertools
+import sys
+
+import numpy as np
+
+from loading import Loading
+
+COLUMNS = ['flight', 'kind', 'location', 'mass']
+RESULTS = ['flight', 'mass', 'xcg', 'violation']
+VIOLATIONS = ['forward', 'aft', 'overweight', 'fuel']
+# Label of every combination of broken limits, indexed by their bit mask in the order of VIOLATIONS
+LABELS = np.array(['+'.join(name for i, name in enumerate(VIOLATIONS) if mask >> i & 1)
+                   for mask in range(2 ** len(VIOLATIONS))])
+
+
+def read_chunks(file_names, chunk_size=100_000):
+    """Yields the manifest rows as arrays of the COLUMNS, at most chunk_size rows at a time"""
+    for file_name in file_names:
+        with open(file_name, newline='') as f:
+            reader = csv.reader(f)
+            header = [name.strip() for name in next(reader)]
+            index = [header.index(name) for name in COLUMNS]
+
+            while True:
+                rows = list(itertools.islice(reader, chunk_size))
+                if not rows:
+                    break
+                yield {name: np.array([row[i].strip() for row in rows]) for name, i in zip(COLUMNS, index)}
+
+
+class ManifestModel:
+
+    def __init__(self, loading, envelope=None):
+        """Stations, operational empty weight and limits of the aircraft the manifests are evaluated on
+
+        args:
+            loading (Loading): aircraft whose stations are used
+            envelope (tuple): (min_xcg, max_xcg) limits, by default the get_maxmincg limits of the loading diagram
+        """
+        # Seat labels of the cabin, sorted for lookup, and their c.g.
+        cabin = loading.get_cabin()
+        order = np.argsort(cabin.label)
+        self.seat_labels = cabin.label[order]
+        self.seat_xcg = cabin.seat_arms(loading.data)[order]
+
+        cargo_xcg, _ = loading.cargo_arms()
+        self.hold_xcg = {'front': cargo_xcg[0], 'aft': cargo_xcg[1]}
+        self.fuel_system = loading.get_fuel_system()
+        self.mass_pax = loading.mass_average_pax
+
+        self.mass_oew = loading.data['OEW']
+        self.moment_oew = self.mass_oew * loading.xcg_oew
+        self.max_mass = loading.data['ramp_mass']
+
+        if envelope is None:
+            loading.get_cg_shift(plot=False)
+            envelope = loading.get_maxmincg()
+        self.envelope = envelope
+
+    def items(self, chunk):
+        """Returns the mass, the moment (mass times x/mac) of the payload and the fuel mass of the manifest rows
+
+        The fuel rows have no moment here: the moment of the fuel of a flight depends on its total, see results. A
+        seat given twice in a flight raises ValueError.
+        """
+        kind, location = chunk['kind'], chunk['location']
+        xcg = np.full(len(kind), np.nan)
+
+        pax = kind == 'pax'
+        if pax.any():
+            seats = np.minimum(np.searchsorted(self.seat_labels, location[pax]), len(self.seat_labels) - 1)
+            unknown = self.seat_labels[seats] != location[pax]
+            if unknown.any():
+                bad = np.flatnonzero(pax)[np.argmax(unknown)]
+                raise ValueError(f"Unknown seat '{location[bad]}' in flight {chunk['flight'][bad]}")
+            xcg[pax] = self.seat_xcg[seats]
+
+            flights = chunk['flight'][pax]
+            order = np.lexsort((seats, flights))
+            taken = (flights[order][1:] == flights[order][:-1]) & (seats[order][1:] == seats[order][:-1])
+            if taken.any():
+                bad = np.flatnonzero(pax)[order[1:][np.argmax(taken)]]
+                raise ValueError(f"Seat '{location[bad]}' is taken twice in flight {chunk['flight'][bad]}")
+
+        hold = (kind == 'bag') | (kind == 'cargo')
+        for name, hold_xcg in self.hold_xcg.items():
+            xcg[hold & (location == name)] = hold_xcg
+
+        fuel = kind == 'fuel'
+        xcg[fuel] = 0
+
+        if np.isnan(xcg).any():
+            bad = np.flatnonzero(np.isnan(xcg))[0]
+            raise ValueError(f"Unknown kind or location '{kind[bad]}' '{location[bad]}' in flight "
+                             f"{chunk['flight'][bad]}")
+
+        mass = chunk['mass']
+        mass = np.where((mass == '') & pax, str(self.mass_pax), mass).astype(float)
+        return mass, mass * xcg, np.where(fuel, mass, 0)
+
+    def results(self, flights, mass, moment, fuel=0):
+        """Returns the c.g., mass and envelope violation of flights
+
+        args:
+            flights (array): flight identifiers, returned as they are
+            mass, moment (array): sums of the items of every flight, fuel included in mass only
+            fuel (array): fuel of every flight [kg]. Fuel beyond the capacity of the tanks is reported as a 'fuel'
+                violation.
+        """
+        mass = self.mass_oew + mass
+        xcg = (self.moment_oew + moment + self.fuel_system.moment(fuel)) / mass
+        violation = self.violations(xcg, mass, fuel)
+        return {'flight': flights, 'mass': mass, 'xcg': xcg, 'violation': violation}
+
+    def violations(self, xcg, mass, fuel=0):
+        """Returns the limits that states break, joined in the order of VIOLATIONS ('aft+overweight'), '' for none
+
+        'forward' and 'aft' are c.g. outside the envelope, 'overweight' a mass above the ramp mass and 'fuel' more
+        fuel than the tanks hold.
+        """
+        min_xcg, max_xcg = self.envelope
+        broken = [xcg < min_xcg, xcg > max_xcg, mass > self.max_mass, np.asarray(fuel) > self.fuel_system.total]
+        return LABELS[sum(np.asarray(flags, dtype=int) << i for i, flags in enumerate(broken))]
+
+
+def evaluate(chunks, model):
+    """Yields the results of the flights in the chunks, as arrays of up to one chunk of flights at a time
+
+    Only the flight that may continue in the next chunk is kept between chunks, so memory does not depend on the size
+    of the archive.
+    """
+    carry = None  # (flight, mass, moment, fuel) of the last, possibly incomplete, flight
+    carry_seats = np.array([], dtype=str)  # Seats taken in that flight
+
+    for chunk in chunks:
+        loads = model.items(chunk)
+        flights = chunk['flight']
+        seats = chunk['location'][chunk['kind'] == 'pax']
+        seat_flights = flights[chunk['kind'] == 'pax']
+
+        starts = np.concatenate([[0], np.flatnonzero(flights[1:] != flights[:-1]) + 1])
+        flight_ids = flights[starts]
+        totals = [np.add.reduceat(values, starts) for values in loads]  # mass, moment, fuel
+
+        continued = carry is not None and carry[0] == flight_ids[0]
+        if continued:
+            taken = np.isin(seats[seat_flights == flight_ids[0]], carry_seats)
+            if taken.any():
+                raise ValueError(f"Seat '{seats[seat_flights == flight_ids[0]][np.argmax(taken)]}' is taken twice in "
+                                 f"flight {flight_ids[0]}")
+        last_seats = seats[seat_flights == flight_ids[-1]]
+        carry_seats = np.concatenate([carry_seats, last_seats]) if continued and len(flight_ids) == 1 else last_seats
+
+        if carry is not None:
+            if continued:
+                for total, value in zip(totals, carry[1:]):
+                    total[0] += value
+            else:
+                flight_ids = np.concatenate([[carry[0]], flight_ids])
+                totals = [np.concatenate([[value], total]) for total, value in zip(totals, carry[1:])]
+
+        carry = (flight_ids[-1], *(total[-1] for total in totals))
+        if len(flight_ids) > 1:
+            yield model.results(flight_ids[:-1], *(total[:-1] for total in totals))
+
+    if carry is not None:
+        yield model.results(np.array([carry[0]]), *(np.array([value]) for value in carry[1:]))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('manifests', nargs='+', help='Manifest csv files')
+    parser.add_argument('--data', default='data.csv', help='Aircraft data file')
+    parser.add_argument('--mac', type=float, default=1, help='mac passed to Loading')
+    parser.add_argument('--change', type=float, default=0, help='OEW c.g. shift passed to Loading')
+    parser.add_argument('--chunk-size', type=int, default=100_000, help='Manifest rows read at a time')
+    parser.add_argument('--violations', action='store_true', help='Only write the flights outside the limits')
+    args = parser.parse_args(argv)
+
+    model = ManifestModel(Loading(args.data, mac=args.mac, change=args.change))
+    writer = csv.writer(sys.stdout)
+    writer.writerow(RESULTS)
+
+    for results in evaluate(read_chunks(args.manifests, args.chunk_size), model):
+        rows = zip(*(results[name] for name in RESULTS))
+        if args.violations:
+            rows = (row for row in rows if row[-1])
+        writer.writerows(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""Monte Carlo simulation of the loading c.g. envelope over random loading scenarios"""
+import warnings
+
+import numpy as np
+
+from helpers import parallel_map
+from loading import Loading, cumulative_cg
+from stats import StreamingHistogram
+
+SCENARIO = {
+    'pax_mass_mean': 92,  # [kg]
+    'pax_mass_std': 15,  # [kg]
+    'pax_mass_min': 40,  # [kg]
+    'load_factor': (0.3, 1.0),  # Range of the fraction of occupied seats
+    'cargo_fraction': (0.0, 1.0),  # Range of the fill fraction of each cargo compartment
+    'fuel_fraction': (0.1, 1.0),  # Range of the fraction of the tank capacity loaded
+}
+
+
+def loading_model(loading, n_columns=None):
+    """Returns the loading stations of a Loading instance as a plain dictionary for the worker processes
+
+    args:
+        loading (Loading): aircraft whose seats (Loading.get_cabin), cargo holds and fuel tanks
+            (Loading.get_fuel_system) are used
+        n_columns (int): deprecated and ignored, the cabin layout defines the seats
+    """
+    if n_columns is not None:
+        warnings.warn("loading_model(n_columns=...) is deprecated and ignored, the seats are those of "
+                      "Loading.get_cabin()", DeprecationWarning, stacklevel=2)
+
+    xcg_cargo, mass_cargo = loading.cargo_arms()
+    system = loading.get_fuel_system()
+
+    return {
+        'xcg_oew': loading.xcg_oew,
+        'mass_oew': loading.data['OEW'],
+        'xcg_seats': loading.get_cabin().seat_arms(loading.data),
+        'xcg_cargo': xcg_cargo,
+        'mass_cargo': mass_cargo,
+        'xcg_tanks': system.xcg,  # Tanks in filling order
+        'capacity_tanks': system.capacity,
+        'filled_before': system.filled_before,
+        'mass_fuel': system.total,
+    }
+
+
+def sample_scenarios(model, scenario, n, rng):
+    """Returns the c.g. and mass of the items of n random loading sequences, each of shape (n, n_items)
+
+    Cargo is loaded first with the two compartments in random order, then the passengers in random boarding order and
+    finally the fuel, filling the tanks one after the other in their filling order.
+    """
+    n_seats = len(model['xcg_seats'])
+
+    cargo_mass = model['mass_cargo'] * rng.uniform(*scenario['cargo_fraction'], size=(n, 2))
+    cargo_xcg = np.broadcast_to(model['xcg_cargo'], (n, 2))
+    aft_first = rng.random((n, 1)) < 0.5
+    cargo_mass = np.where(aft_first, cargo_mass[:, ::-1], cargo_mass)
+    cargo_xcg = np.where(aft_first, cargo_xcg[:, ::-1], cargo_xcg)
+
+    # Occupancy and passenger masses are independent per seat, so shuffling the seat arms gives a random boarding order
+    load_factor = rng.uniform(*scenario['load_factor'], size=(n, 1))
+    occupied = rng.random((n, n_seats)) < load_factor
+    pax_mass = np.maximum(rng.normal(scenario['pax_mass_mean'], scenario['pax_mass_std'], size=(n, n_seats)),
+                          scenario['pax_mass_min']) * occupied
+    pax_xcg = model['xcg_seats'][np.argsort(rng.random((n, n_seats)), axis=1)]
+
+    fuel = model['mass_fuel'] * rng.uniform(*scenario['fuel_fraction'], size=(n, 1))
+    fuel_mass = np.clip(fuel - model['filled_before'], 0, model['capacity_tanks'])
+    fuel_xcg = np.broadcast_to(model['xcg_tanks'], fuel_mass.shape)
+
+    xcg = np.concatenate([cargo_xcg, pax_xcg, fuel_xcg], axis=1)
+    mass = np.concatenate([cargo_mass, pax_mass, fuel_mass], axis=1)
+    return xcg, mass
+
+
+def simulate_chunk(model, scenario, n, seed, bins, xcg_range, mass_range):
+    """Simulates n scenarios and returns their histograms"""
+    rng = np.random.default_rng(seed)
+    xcg_items, mass_items = sample_scenarios(model, scenario, n, rng)
+    xcg, mass = cumulative_cg(model['xcg_oew'], model['mass_oew'], xcg_items, mass_items)
+
+    histograms = {
+        'min_xcg': StreamingHistogram(*xcg_range, bins),  # Most forward c.g. during loading
+        'max_xcg': StreamingHistogram(*xcg_range, bins),  # Most aft c.g. during loading
+        'zfw_xcg': StreamingHistogram(*xcg_range, bins),  # c.g. before fuelling
+        'ramp_xcg': StreamingHistogram(*xcg_range, bins),  # c.g. at ramp mass
+        'ramp_mass': StreamingHistogram(*mass_range, bins),
+    }
+    histograms['min_xcg'].update(xcg.min(axis=1))
+    histograms['max_xcg'].update(xcg.max(axis=1))
+    histograms['zfw_xcg'].update(xcg[:, -len(model['xcg_tanks']) - 1])
+    histograms['ramp_xcg'].update(xcg[:, -1])
+    histograms['ramp_mass'].update(mass[:, -1])
+
+    return histograms
+
+
+def simulate(n_samples, file_name='data.csv', mac=1, change=0, chunk_size=20_000, workers=None, seed=0, bins=2000,
+             xcg_range=(-0.5, 1.5), loading=None, **scenario):
+    """Returns streaming histograms of the loading c.g. over n_samples random loading scenarios
+
+    Chunks of chunk_size scenarios are simulated on a process pool and merged as they complete, so memory depends on
+    chunk_size and bins only.
+
+    args:
+        n_samples (int): number of loading scenarios, at least 1
+        file_name, mac, change: passed to Loading
+        workers (int): number of processes, None for one per core and 0 to run in this process
+        seed (int): seed of the random streams; each chunk gets an independent child stream
+        bins (int): histogram bins, the quantile resolution is (xcg_range[1] - xcg_range[0]) / bins
+        loading (Loading): aircraft to load, with its cabin and fuel system, instead of the one of file_name
+        scenario: overrides for the entries of SCENARIO
+    """
+    if n_samples < 1:
+        raise ValueError(f"n_samples must be at least 1, got {n_samples}")
+    unknown = set(scenario) - set(SCENARIO)
+    if unknown:
+        raise KeyError(f"Unknown scenario parameters: {sorted(unknown)}")
+    scenario = {**SCENARIO, **scenario}
+
+    model = loading_model(Loading(file_name, mac=mac, change=change) if loading is None else loading)
+    max_payload = len(model['xcg_seats']) * scenario['pax_mass_mean'] * 2 + model['mass_cargo'].sum()
+    mass_range = (model['mass_oew'], model['mass_oew'] + max_payload + model['mass_fuel'])
+    seeds = np.random.SeedSequence(seed)
+
+    def tasks():
+        remaining = n_samples
+        while remaining > 0:
+            n = min(chunk_size, remaining)
+            remaining -= n
+            yield model, scenario, n, seeds.spawn(1)[0], bins, xcg_range, mass_range
+
+    totals = None
+    for histograms in parallel_map(simulate_chunk, tasks(), workers=workers):
+        if totals is None:
+            totals = histograms
+        else:
+            for name, histogram in histograms.items():
+                totals[name].merge(histogram)
+
+    return totals
+
+
+def main():
+    results = simulate(10 ** 6, file_name='NewData.csv', mac=3.17, change=0.6)
+
+    print('-' * 60)
+    print(f"{'Monte Carlo loading envelope':^60}")
+    print('-' * 60)
+    for name, histogram in results.items():
+        summary = histogram.summary()
+        print(f"{name:<12} {'min':<5} {summary['min']:<12.5f} {'q0.001':<7} {summary['q0.001']:<12.5f} "
+              f"{'q0.999':<7} {summary['q0.999']:<12.5f} {'max':<5} {summary['max']:<12.5f}")
+
+
+if __name__ == "__main__":
+    main()
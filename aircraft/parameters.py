@@ -0,0 +1,161 @@
+"""Typed aircraft parameters with a declared schema, checked when the data file is loaded"""
+from collections.abc import Mapping
+
+import numpy as np
+
+# key in the data file, unit, allowed range (positive, non-negative, fraction in (0, 1], angle in (-90, 90) or any)
+SCHEMA = [
+    ('XcgOEW', '-', 'fraction'),
+    ('fuel_max', 'kg', 'non-negative'),
+    ('dist_seats', 'm', 'positive'),
+    ('ramp_mass', 'kg', 'positive'),
+    ('MTOW', 'kg', 'positive'),
+    ('OEW', 'kg', 'positive'),
+    ('pax_cab_w', 'kg', 'non-negative'),
+    ('front_cargo_w', 'kg', 'non-negative'),
+    ('aft_cargo_w', 'kg', 'non-negative'),
+
+    # Wing
+    ('S', 'm2', 'positive'),
+    ('mac', 'm', 'positive'),
+    ('XLEMAC', 'm', 'any'),
+    ('b', 'm', 'positive'),
+    ('A', '-', 'positive'),
+    ('quart_sweep', 'deg', 'angle'),
+    ('taper', '-', 'fraction'),
+    ('t/c', '%', 'positive'),
+    ('l_fn', 'm', 'non-negative'),
+    ('nose_distance_w', 'm', 'non-negative'),
+
+    # Horizontal tail
+    ('b_h', 'm', 'positive'),
+    ('S_h', 'm2', 'positive'),
+    ('l_h', 'm', 'positive'),
+    ('A_h', '-', 'positive'),
+    ('quart_sweep_h', 'deg', 'angle'),
+    ('taper_h', '-', 'fraction'),
+    ('nose_distance_h', 'm', 'non-negative'),
+
+    # Fuselage
+    ('b_f', 'm', 'positive'),
+    ('h_f', 'm', 'positive'),
+    ('l_f', 'm', 'positive'),
+
+    # Nacelles, flight conditions and high-lift devices
+    ('b_n', 'm', 'non-negative'),
+    ('l_n', 'm', 'non-negative'),
+    ('n_eng', '-', 'non-negative'),
+    ('v_max', 'kts', 'positive'),
+    ('v_app', 'kts', 'positive'),
+    ('h_cruise', 'ft', 'non-negative'),
+    ('z_h', 'm', 'any'),
+    ('S_hld', 'm2', 'non-negative'),
+    ('CL_max', '-', 'positive'),
+
+    # Vertical tail
+    ('S_v', 'm2', 'positive'),
+    ('b_half_v', 'm', 'positive'),
+    ('A_v', '-', 'positive'),
+    ('taper_v', '-', 'fraction'),
+    ('quart_sweep_v', 'deg', 'angle'),
+    ('nose_distance_v', 'm', 'non-negative'),
+
+    ('ME', 'kg', 'non-negative'),
+]
+
+KEYS = [key for key, _, _ in SCHEMA]
+UNITS = {key: unit for key, unit, _ in SCHEMA}
+ATTRIBUTES = {key: key.replace('/', '_') for key in KEYS}  # 't/c' is read as .t_c
+
+CHECKS = {
+    'positive': (lambda value: value > 0, 'positive'),
+    'non-negative': (lambda value: value >= 0, 'non-negative'),
+    'fraction': (lambda value: (value > 0) & (value <= 1), 'in (0, 1]'),
+    'angle': (lambda value: (value > -90) & (value < 90), 'in (-90, 90) deg'),
+    'any': (lambda value: True, ''),
+}
+
+DTYPE = np.dtype([(key, float) for key in KEYS])  # Record of every parameter, for structured arrays of designs
+
+
+def validate(data, source='data'):
+    """Raises ValueError naming the parameters of the schema that data is missing or holds out of range"""
+    missing = [key for key in KEYS if key not in data]
+    if missing:
+        raise ValueError(f"{source}: missing parameters {', '.join(missing)}")
+
+    for key, unit, check in SCHEMA:
+        valid, description = CHECKS[check]
+        if not np.all(valid(data[key])):
+            raise ValueError(f"{source}: '{key}' [{unit}] must be {description}, got {data[key]}")
+
+
+class Parameters(Mapping):
+    """Aircraft data as attributes (params.quart_sweep, params.t_c) that also reads as a read-only mapping
+
+    Values are floats, or arrays of designs. Keys outside the schema are kept and only reachable through the mapping.
+    The mapping is backed by a dictionary built once, so lookups and dict(params) cost what they cost on a dict.
+    """
+    __slots__ = tuple(ATTRIBUTES.values()) + ('extra', '_data')
+
+    def __init__(self, data, source='data'):
+        validate(data, source)
+        for key, attribute in ATTRIBUTES.items():
+            object.__setattr__(self, attribute, data[key])
+        object.__setattr__(self, 'extra', {key: value for key, value in data.items() if key not in ATTRIBUTES})
+        object.__setattr__(self, '_data', {**{key: data[key] for key in KEYS}, **self.extra})
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is read-only, use replace()")
+
+    def __reduce__(self):
+        return type(self), (self._data.copy(),)
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def keys(self):
+        return self._data.keys()
+
+    def items(self):
+        return self._data.items()
+
+    def values(self):
+        return self._data.values()
+
+    def get(self, key, default=None):
+        return self._data.get(key, default)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self._data})"
+
+    def replace(self, **changes):
+        """Returns a copy with the given parameters, by attribute name, changed and checked"""
+        data = self._data.copy()
+        keys = {attribute: key for key, attribute in ATTRIBUTES.items()}
+        for attribute, value in changes.items():
+            data[keys.get(attribute, attribute)] = value
+        return type(self)(data)
+
+    def to_array(self):
+        """Returns the schema parameters as a float array in KEYS order, designs along the trailing axes"""
+        return np.array([getattr(self, attribute) for attribute in ATTRIBUTES.values()], dtype=float)
+
+    @classmethod
+    def from_array(cls, values, extra=None):
+        """Builds parameters from an array in KEYS order, as returned by to_array"""
+        return cls({**dict(zip(KEYS, values)), **(extra or {})})
+
+    @staticmethod
+    def stack(parameters):
+        """Returns a structured array of DTYPE with one record per parameters, accepted by batch.design_sweep"""
+        return np.rec.fromarrays(np.array([p.to_array() for p in parameters]).T, dtype=DTYPE).view(np.ndarray)
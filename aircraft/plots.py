@@ -0,0 +1,195 @@
+"""Headless batch rendering of loading diagrams and scissor plots
+
+Computing and drawing are separate: Loading.loading_diagram and Stabcont.scissor_lines return the lines, and the
+figure classes below draw them. A figure is built once per process and its artists are updated for every variant,
+on the Agg canvas, so no display or pyplot state is needed.
+
+    python plots.py variants/ --output plots/
+    python plots.py --data NewData.csv --sweep A=7:11:2000 --kind scissor --output plots/ --workers 8
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+from fleet import find_files
+from helpers import load_parameters, parallel_map
+from loading import Loading
+from Stabcont import Stabcont
+
+KINDS = ['loading', 'scissor']
+
+LOADING_STYLES = {
+    'cargo': {'c': '#003f5c', 'marker': 'o'},
+    'window': {'c': '#58508d', 'marker': '+'},
+    'aisle': {'c': '#bc5090', 'marker': '+'},
+    'middle': {'c': '#ff6361', 'marker': '+'},
+    'fuel': {'c': '#ffa600', 'marker': 's'},
+}
+LOADING_LABELS = ['(1) Cargo', '(2) Window seats', '(3) Aisle seats', '(4) Middle seats', '(5) Fuel']
+
+_figures = {}  # kind -> figure of this process, reused by every render
+
+
+def headless_figure(**kwargs):
+    """Returns a matplotlib Figure drawn on the Agg canvas, independent of pyplot and of the default backend"""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure(**kwargs)
+    FigureCanvasAgg(fig)
+    return fig
+
+
+class LoadingDiagram:
+
+    def __init__(self, fig=None):
+        """Creates the axes and the artists of a loading diagram, on a headless figure by default"""
+        self.fig = headless_figure() if fig is None else fig
+        self.ax = ax = self.fig.add_subplot()
+
+        self.lines = {}
+        for group, style in LOADING_STYLES.items():
+            n_orders = 1 if group == 'fuel' else 2
+            self.lines[group] = [ax.plot([], [], **style)[0] for _ in range(n_orders)]
+        self.limits = [ax.plot([], [], '--k', alpha=0.55)[0] for _ in range(2)]
+
+        self.fig.suptitle("Loading diagram", fontsize=16)
+        ax.set_xlabel(r'$X_{cg_{MAC}}$ [-]')
+        ax.set_ylabel(f'Mass [kg]')
+        ax.legend([lines[0] for lines in self.lines.values()], LOADING_LABELS)
+        ax.grid()
+
+    def update(self, diagram):
+        """Draws the lines returned by Loading.loading_diagram"""
+        for group, lines in self.lines.items():
+            points = diagram[group]
+            for i, line in enumerate(lines):
+                line.set_data(points[2 * i], points[2 * i + 1])
+
+        min_xcg, max_xcg = diagram['min_xcg'], diagram['max_xcg']
+        masses = [diagram['min_mass'], diagram['max_mass']]
+        self.limits[0].set_data([max_xcg, max_xcg], masses)
+        self.limits[1].set_data([min_xcg, min_xcg], masses)
+
+        self.ax.relim()
+        self.ax.autoscale_view(scalex=False)
+        self.ax.set_xlim(min_xcg * 0.8, max_xcg * 1.1)
+        return self
+
+    def save(self, file_name, **kwargs):
+        self.fig.savefig(file_name, **kwargs)
+
+
+class ScissorPlot:
+
+    def __init__(self, fig=None):
+        """Creates the axes and the artists of a scissor plot, on a headless figure by default"""
+        self.fig = headless_figure() if fig is None else fig
+        self.ax = ax = self.fig.add_subplot()
+
+        self.limits = [ax.plot([], [], color='black')[0] for _ in range(2)]
+        self.stab, = ax.plot([], [])
+        self.stab_sm, = ax.plot([], [], label='S.M.')
+        self.cont, = ax.plot([], [])
+
+        ax.set_xlabel(r'$\frac{x_{cg}}{mac}$', fontsize=22)
+        ax.set_ylabel(r'$\frac{S_h}{S}$', fontsize=22)
+        ax.legend()
+        ax.grid()
+
+    def update(self, lines):
+        """Draws the lines returned by Stabcont.scissor_lines"""
+        self.limits[0].set_data([lines['min_xcg']] * 2, [0, 0.4])
+        self.limits[1].set_data([lines['max_xcg']] * 2, [0, 0.4])
+        self.stab.set_data(lines['xcg'], lines['stab'])
+        self.stab_sm.set_data(lines['xcg'], lines['stab_sm'])
+        self.cont.set_data(lines['xcg'], lines['cont'])
+
+        self.ax.set_autoscale_on(True)
+        self.ax.relim()
+        self.ax.autoscale_view()
+        self.ax.set_ylim(bottom=0)
+        return self
+
+    def save(self, file_name, **kwargs):
+        self.fig.savefig(file_name, **kwargs)
+
+
+def figure(kind):
+    """Returns the figure of kind ('loading' or 'scissor') of this process, created on first use"""
+    if kind not in _figures:
+        _figures[kind] = LoadingDiagram() if kind == 'loading' else ScissorPlot()
+    return _figures[kind]
+
+
+def render_variants(variants, kinds, directory, fmt='png', dpi=100, change=0.6):
+    """Renders the plots of kinds for every variant and returns the number of files written
+
+    args:
+        variants (list): (name, file_name, overrides) of each variant, overrides replacing values of the file
+        kinds (list): plots to render, from KINDS
+        directory (str): output directory, the files are named <name>_<kind>.<fmt>
+        change (float): OEW c.g. shift [m] passed to Loading, with the mac taken from the data
+    """
+    n_plots = 0
+    for name, file_name, overrides in variants:
+        data = {**load_parameters(file_name), **overrides}
+
+        lines = {'loading': Loading(file_name, mac=data['mac'], change=change, data=data).loading_diagram()}
+        if 'scissor' in kinds:
+            cg_range = lines['loading']['min_xcg'], lines['loading']['max_xcg']
+            lines['scissor'] = Stabcont(file_name, data=data).scissor_lines(*cg_range)
+
+        for kind in kinds:
+            figure(kind).update(lines[kind]).save(os.path.join(directory, f'{name}_{kind}.{fmt}'), dpi=dpi)
+            n_plots += 1
+    return n_plots
+
+
+def render(variants, kinds=KINDS, directory='plots', fmt='png', dpi=100, change=0.6, workers=None, chunk_size=64):
+    """Renders the variants on a process pool in chunks of chunk_size variants and returns the number of plots"""
+    os.makedirs(directory, exist_ok=True)
+    tasks = ((variants[i:i + chunk_size], kinds, directory, fmt, dpi, change)
+             for i in range(0, len(variants), chunk_size))
+    return sum(parallel_map(render_variants, tasks, workers=workers))
+
+
+def sweep_variants(file_name, sweep):
+    """Returns the variants of file_name for the values of a 'NAME=START:STOP:N' sweep"""
+    name, values = sweep.split('=')
+    start, stop, n = values.split(':')
+    stem = os.path.splitext(os.path.basename(file_name))[0]
+    return [(f'{stem}_{name}_{i:05d}', file_name, {name: value})
+            for i, value in enumerate(np.linspace(float(start), float(stop), int(n)))]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('patterns', nargs='*', help='Directories or glob patterns of aircraft data files')
+    parser.add_argument('--data', default='data.csv', help='Aircraft data file swept with --sweep')
+    parser.add_argument('--sweep', help="Variants of --data, as 'NAME=START:STOP:N'")
+    parser.add_argument('--kind', nargs='+', choices=KINDS, default=KINDS, help='Plots rendered for every variant')
+    parser.add_argument('--output', default='plots', help='Output directory')
+    parser.add_argument('--format', default='png', help='Image format')
+    parser.add_argument('--dpi', type=int, default=100)
+    parser.add_argument('--change', type=float, default=0.6, help='OEW c.g. shift [m] used for the loading diagram')
+    parser.add_argument('--workers', type=int, default=None, help='Processes, 0 to run in this process')
+    parser.add_argument('--chunk-size', type=int, default=64, help='Variants rendered per task')
+    args = parser.parse_args(argv)
+
+    variants = [(os.path.splitext(os.path.basename(file_name))[0], file_name, {})
+                for file_name in find_files(args.patterns)]
+    if args.sweep:
+        variants += sweep_variants(args.data, args.sweep)
+
+    start = time.perf_counter()
+    n_plots = render(variants, args.kind, args.output, args.format, args.dpi, args.change, args.workers,
+                     args.chunk_size)
+    elapsed = time.perf_counter() - start
+    print(f"{n_plots} plots in {elapsed:.2f} s ({n_plots / elapsed:.1f} plots/s)")
+
+
+if __name__ == "__main__":
+    main()
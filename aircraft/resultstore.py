@@ -0,0 +1,185 @@
+"""Memory-mapped columnar store for the results of large design studies
+
+A store is a directory holding one raw binary file per column and a meta.json file with the schema, the row count and
+a zone index (minimum and maximum of every column per chunk of rows). Rows are appended incrementally and columns are
+read as memory maps, so studies larger than the RAM can be written and queried.
+"""
+import json
+import os
+import re
+
+import numpy as np
+
+META = 'meta.json'
+
+
+class ResultStore:
+
+    def __init__(self, path, chunk_rows=65536):
+        """Opens the store in directory path, creating it if needed
+
+        args:
+            path (str): directory of the store
+            chunk_rows (int): rows per chunk of the zone index, only used when the store is created
+        """
+        self.path = path
+        self._maps = {}
+
+        meta_file = os.path.join(path, META)
+        if os.path.exists(meta_file):
+            with open(meta_file) as f:
+                self.meta = json.load(f)
+        else:
+            os.makedirs(path, exist_ok=True)
+            self.meta = {'columns': {}, 'rows': 0, 'capacity': 0, 'chunk_rows': chunk_rows, 'zones': {}}
+
+    def __len__(self):
+        return self.meta['rows']
+
+    @property
+    def columns(self):
+        return list(self.meta['columns'])
+
+    def _file(self, name):
+        return os.path.join(self.path, self.meta['columns'][name]['file'])
+
+    def _map(self, name):
+        if name not in self._maps:
+            dtype = self.meta['columns'][name]['dtype']
+            self._maps[name] = np.memmap(self._file(name), dtype=dtype, mode='r+', shape=(self.meta['capacity'],))
+        return self._maps[name]
+
+    def _create(self, records):
+        for name, values in records.items():
+            file_name = re.sub(r'[^\w.-]', '_', name) + f'.{len(self.meta["columns"])}.bin'
+            self.meta['columns'][name] = {'dtype': values.dtype.str, 'file': file_name}
+            self.meta['zones'][name] = []
+            open(self._file(name), 'wb').close()
+
+    def _grow(self, rows):
+        chunk_rows = self.meta['chunk_rows']
+        capacity = max(rows, 2 * self.meta['capacity'], chunk_rows)
+        capacity = -(-capacity // chunk_rows) * chunk_rows
+
+        self._maps.clear()
+        for name, column in self.meta['columns'].items():
+            with open(self._file(name), 'r+b') as f:
+                f.truncate(capacity * np.dtype(column['dtype']).itemsize)
+        self.meta['capacity'] = capacity
+
+    def append(self, records):
+        """Appends rows given as a dictionary of equally long (or scalar) column values
+
+        The first append defines the columns and their types, later appends must give the same columns with values
+        that cast safely to their types. Columns must be numeric (boolean, integer or float), the zone index needs their
+        minimum and maximum: other types raise TypeError. NaN values are left out of the zone index. A batch without
+        rows writes nothing.
+        """
+        names = list(records)
+        values = np.broadcast_arrays(*(np.atleast_1d(np.asarray(records[name])).ravel() for name in names))
+        records = dict(zip(names, values))
+
+        for name, column in records.items():
+            if column.dtype.kind not in 'biuf':
+                raise TypeError(f"Column '{name}' has the non-numeric type {column.dtype}, only numbers can be stored")
+        if not values or len(values[0]) == 0:
+            return
+
+        if not self.meta['columns']:
+            self._create(records)
+        if set(records) != set(self.meta['columns']):
+            raise KeyError(f"Columns {sorted(records)} do not match the store columns {sorted(self.columns)}")
+        for name, column in records.items():
+            dtype = np.dtype(self.meta['columns'][name]['dtype'])
+            if not np.can_cast(column.dtype, dtype, 'safe'):
+                raise TypeError(f"Column '{name}' of type {dtype} cannot safely store values of type {column.dtype}")
+
+        start = self.meta['rows']
+        end = start + len(values[0])
+        if end > self.meta['capacity']:
+            self._grow(end)
+
+        chunk_rows = self.meta['chunk_rows']
+        for name, values in records.items():
+            column = self._map(name)
+            column[start:end] = values
+            column.flush()
+
+            zones = self.meta['zones'][name]
+            for chunk in range(start // chunk_rows, (end - 1) // chunk_rows + 1):
+                part = values[max(chunk * chunk_rows, start) - start:min((chunk + 1) * chunk_rows, end) - start]
+                low, high = float(np.fmin.reduce(part)), float(np.fmax.reduce(part))  # NaN if all values are NaN
+                if chunk < len(zones):
+                    zones[chunk] = [float(np.fmin(zones[chunk][0], low)), float(np.fmax(zones[chunk][1], high))]
+                else:
+                    zones.append([low, high])
+
+        self.meta['rows'] = end
+        self._write_meta()
+
+    def _write_meta(self):
+        meta_file = os.path.join(self.path, META)
+        with open(meta_file + '.tmp', 'w') as f:
+            json.dump(self.meta, f)
+        os.replace(meta_file + '.tmp', meta_file)
+
+    def column(self, name, start=0, stop=None):
+        """Returns a read-only memory-mapped view of the rows start:stop of a column"""
+        stop = len(self) if stop is None else min(stop, len(self))
+        view = self._map(name)[start:stop].view(np.ndarray)
+        view.flags.writeable = False
+        return view
+
+    def chunks(self, columns=None):
+        """Yields the rows one index chunk at a time as dictionaries of arrays"""
+        chunk_rows = self.meta['chunk_rows']
+        for start in range(0, len(self), chunk_rows):
+            yield {name: self.column(name, start, start + chunk_rows) for name in columns or self.columns}
+
+    def query(self, **ranges):
+        """Returns the indices of the rows with every given column inside its (low, high) range, bounds included
+
+        Only the chunks whose zone index overlaps all the ranges are read.
+        """
+        chunk_rows = self.meta['chunk_rows']
+        n_chunks = -(-len(self) // chunk_rows)
+
+        candidates = np.ones(n_chunks, dtype=bool)
+        for name, (low, high) in ranges.items():
+            zones = np.array(self.meta['zones'][name]).reshape(-1, 2)[:n_chunks]
+            candidates &= (zones[:, 1] >= low) & (zones[:, 0] <= high)
+
+        rows = []
+        for chunk in np.flatnonzero(candidates):
+            start = chunk * chunk_rows
+            inside = np.ones(min(chunk_rows, len(self) - start), dtype=bool)
+            for name, (low, high) in ranges.items():
+                values = self.column(name, start, start + chunk_rows)
+                inside &= (values >= low) & (values <= high)
+            rows.append(start + np.flatnonzero(inside))
+
+        return np.concatenate(rows) if rows else np.array([], dtype=np.int64)
+
+    def take(self, rows, columns=None):
+        """Returns the given rows as a dictionary of arrays"""
+        return {name: self._map(name)[rows] for name in columns or self.columns}
+
+
+def main():
+    from helpers import load_data
+    from sensitivity import evaluate
+
+    base = load_data('data.csv')
+    store = ResultStore('results')
+    for seed in range(10):
+        rng = np.random.default_rng(seed)
+        params = {'A': rng.uniform(7, 11, 100_000), 'S_h': rng.uniform(10, 20, 100_000)}
+        data = {name: np.full(100_000, value) for name, value in base.items()} | params
+        store.append(params | evaluate(data))
+
+    rows = store.query(A=(10, 11), sratio_req=(0, 0.25))
+    print(f"{len(rows)} of {len(store)} designs with A >= 10 and S_h/S required below 0.25")
+
+
+if __name__ == "__main__":
+    main()
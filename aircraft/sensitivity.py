@@ -0,0 +1,100 @@
+"""Sensitivities of the c.g., aerodynamic centre, downwash and tail requirement to every input parameter"""
+import numpy as np
+
+from cg_calculation import CenterOfGravity
+from helpers import load_data
+from loading import Loading, cumulative_cg, loading_orders
+from Stabcont import Stabcont
+
+OUTPUTS = ['cg', 'x_ac', 'downwash', 'sratio_req']
+
+
+def loading_range(data, mac=1, change=0, margin=0.02, factors=None):
+    """Returns the OEW c.g. and the loading c.g. limits (min_xcg, max_xcg) of data holding 1d arrays of designs
+
+    The limits are recomputed for every design from the front-first and aft-first loading orders, as in
+    Loading.get_cg_shift and Loading.get_maxmincg. factors are passed to CenterOfGravity.
+    """
+    cg = CenterOfGravity(data=data, factors=factors).cg
+    xcg_oew = (cg * mac - change) / mac
+
+    xcg_items, mass_items, _ = loading_orders(data, Loading.n_seats, Loading.mass_average_pax)
+    xcg, _ = cumulative_cg(xcg_oew[:, np.newaxis], data['OEW'][:, np.newaxis], xcg_items, mass_items)
+    min_xcg = xcg.min(axis=(-2, -1)) * (1 - margin)
+    max_xcg = xcg.max(axis=(-2, -1)) * (1 + margin)
+    return cg, min_xcg, max_xcg
+
+
+def evaluate(data, mac=1, change=0, margin=0.02, factors=None):
+    """Returns the OEW c.g., cruise x_ac, downwash and required S_h/S of data holding 1d arrays of designs
+
+    The loading c.g. limits of loading_range are also returned as 'min_xcg' and 'max_xcg'.
+    """
+    cg, min_xcg, max_xcg = loading_range(data, mac, change, margin, factors)
+
+    ac = Stabcont(data=data)
+    return {
+        'cg': cg,
+        'x_ac': ac.getx_ac('cruise'),
+        'downwash': ac.getdownwash(),
+        'sratio_req': ac.required_tail(min_xcg, max_xcg)['sratio_req'],
+        'min_xcg': min_xcg,
+        'max_xcg': max_xcg,
+    }
+
+
+def jacobian(file_name='data.csv', parameters=None, step=1e-6, mac=1, change=0):
+    """Returns the derivatives of the OUTPUTS with respect to the input parameters
+
+    All central differences are evaluated in one vectorized pass: the baseline and the +h/-h perturbation of every
+    parameter are stacked as 2 * n_parameters + 1 designs.
+
+    args:
+        file_name (str): csv file with the baseline aircraft data
+        parameters (list): names of the parameters to differentiate with respect to, all of them by default
+        step (float): relative step, h = step * max(|x|, 1)
+        mac, change: OEW c.g. shift, as in Loading
+
+    returns:
+        dict: 'parameters' and 'outputs' names, baseline 'values' of the outputs, the 'jacobian' of shape
+        (n_outputs, n_parameters) and the 'elasticity' (dy/dx * x/y) of the same shape
+    """
+    base = load_data(file_name)
+    names = list(parameters or base)
+    x = np.array([base[name] for name in names])
+    h = step * np.maximum(np.abs(x), 1)
+
+    n = 2 * len(names) + 1
+    data = {name: np.full(n, value) for name, value in base.items()}
+    for i, name in enumerate(names):
+        data[name][2 * i + 1] += h[i]
+        data[name][2 * i + 2] -= h[i]
+
+    results = evaluate(data, mac=mac, change=change)
+
+    values = np.array([results[output][0] for output in OUTPUTS])
+    jacobian = np.array([(results[output][1::2] - results[output][2::2]) / (2 * h) for output in OUTPUTS])
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        elasticity = jacobian * x / values[:, np.newaxis]
+
+    return {
+        'parameters': names,
+        'outputs': OUTPUTS,
+        'values': dict(zip(OUTPUTS, values)),
+        'jacobian': jacobian,
+        'elasticity': elasticity,
+    }
+
+
+def main():
+    results = jacobian('NewData.csv', mac=3.17, change=0.6)
+
+    print(f"{'Parameter':<16}" + ''.join(f"{output:>14}" for output in results['outputs']))
+    order = np.argsort(-np.abs(results['elasticity']).max(axis=0))
+    for i in order:
+        print(f"{results['parameters'][i]:<16}" + ''.join(f"{value:>14.4f}" for value in results['elasticity'][:, i]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""Long-lived c.g. and stability query server speaking JSON lines
+
+The parsed data, loading stations, c.g. limits and tail coefficients of every aircraft are kept warm between
+requests, so a query costs no start-up, parsing or model construction. Each request is one JSON object per line and
+gets one JSON line back, in order:
+
+    {"id": 1, "op": "loading_cg", "data": "NewData.csv", "items": [{"kind": "pax", "location": "12C"},
+                                                                   {"kind": "cargo", "location": "aft", "mass": 850}]}
+    {"id": 2, "op": "envelope", "xcg": [0.1, 0.4], "mass": [30000, 38000]}
+    {"id": 3, "op": "scissor", "xcg": [0, 0.5, 1]}
+    {"id": 4, "op": "batch", "requests": [{"op": "envelope", "xcg": 0.2, "mass": 30000}, ...]}
+
+Every request may give the aircraft "data" file (data.csv by default) and the "mac" and "change" passed to Loading.
+
+    python server.py --socket /tmp/aircraft.sock --preload data.csv NewData.csv
+    python server.py --stdio < requests.jsonl
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import stat
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from helpers import get_logger, load_parameters
+from loading import Loading
+from manifests import ManifestModel
+from Stabcont import Stabcont
+
+logger = get_logger('server')
+
+
+class Aircraft:
+
+    def __init__(self, file_name='data.csv', mac=1, change=0):
+        """Warm state of one aircraft: stations and c.g. limits of its loading diagram and its tail requirement"""
+        self.params = load_parameters(file_name)
+        self.model = ManifestModel(Loading(file_name, mac=mac, change=change))
+        self.ac = Stabcont(file_name)
+        self.tail = self.ac.required_tail(*self.model.envelope)
+
+    def loading_cg(self, request):
+        items = request['items']
+        chunk = {
+            'flight': np.zeros(len(items), dtype=int),
+            'kind': np.array([item['kind'] for item in items], dtype=str),
+            'location': np.array([item.get('location', '') for item in items], dtype=str),
+            'mass': np.array([str(item.get('mass', '')) for item in items], dtype=str),
+        }
+        mass, moment, fuel = self.model.items(chunk)
+        results = self.model.results(None, mass.sum(), moment.sum(), fuel.sum())
+        return {'xcg': results['xcg'], 'mass': results['mass'], 'violation': results['violation']}
+
+    def envelope(self, request):
+        xcg = np.asarray(request['xcg'], dtype=float)
+        mass = np.asarray(request['mass'], dtype=float)
+        min_xcg, max_xcg = self.model.envelope
+        return {
+            'min_xcg': min_xcg,
+            'max_xcg': max_xcg,
+            'max_mass': self.model.max_mass,
+            'violation': self.model.violations(xcg, mass),
+        }
+
+    def scissor(self, request):
+        min_xcg, max_xcg = self.model.envelope
+        results = {'min_xcg': min_xcg, 'max_xcg': max_xcg, **self.tail}
+        if 'xcg' in request:
+            results.update(self.ac.scissor_lines(min_xcg, max_xcg, np.asarray(request['xcg'], dtype=float)))
+        return results
+
+
+def jsonable(value):
+    """Converts NumPy arrays and scalars, also inside dictionaries, to JSON types"""
+    if isinstance(value, dict):
+        return {name: jsonable(item) for name, item in value.items()}
+    if isinstance(value, (np.ndarray, np.generic)):
+        return value.tolist()
+    return value
+
+
+class Server:
+    operations = ['loading_cg', 'envelope', 'scissor']
+    line_limit = 2 ** 26  # Longest request line read from a socket [bytes], longer ones are answered with an error
+
+    def __init__(self):
+        """Answers requests against warm aircraft
+
+        On a socket, the requests are answered on a single worker thread while the event loop keeps reading from and
+        writing to every client, so a client sending heavy requests delays the others by one request at a time
+        instead of stalling their connections. The warm aircraft are only used from that thread and need no locking.
+        """
+        self.aircraft = {}  # (file_name, mac, change) -> Aircraft
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+    def get_aircraft(self, file_name='data.csv', mac=1, change=0):
+        """Returns the warm aircraft, rebuilt when its data file has changed"""
+        key = file_name, mac, change
+        aircraft = self.aircraft.get(key)
+        if aircraft is None or aircraft.params is not load_parameters(file_name):
+            logger.debug('building %s', key)
+            aircraft = self.aircraft[key] = Aircraft(file_name, mac, change)
+        return aircraft
+
+    def handle(self, request):
+        """Returns the response to one request"""
+        response = {'id': request.get('id')} if isinstance(request, dict) else {'id': None}
+        try:
+            op = request['op']
+            if op == 'batch':
+                response['results'] = [self.handle(item) for item in request['requests']]
+            elif op in self.operations:
+                aircraft = self.get_aircraft(request.get('data', 'data.csv'), request.get('mac', 1),
+                                             request.get('change', 0))
+                response['result'] = jsonable(getattr(aircraft, op)(request))
+            else:
+                raise ValueError(f"Unknown operation '{op}'")
+        except Exception as error:  # A bad request is answered with its error, the server keeps running
+            response['error'] = f'{type(error).__name__}: {error}'
+        return response
+
+    def handle_line(self, line):
+        try:
+            request = json.loads(line)
+        except ValueError as error:
+            response = {'id': None, 'error': f'{type(error).__name__}: {error}'}
+        else:
+            response = self.handle(request)
+        return json.dumps(response) + '\n'
+
+    @staticmethod
+    async def read_line(reader):
+        """Returns the next line, b'' at the end of the stream, or None for a line longer than the stream limit
+
+        A line over the limit is skipped up to its end, so the next request is read from its start.
+        """
+        try:
+            return await reader.readuntil(b'\n')
+        except asyncio.IncompleteReadError as error:
+            return error.partial
+        except asyncio.LimitOverrunError:
+            while True:
+                try:
+                    await reader.readuntil(b'\n')
+                    return None
+                except asyncio.LimitOverrunError as error:
+                    await reader.readexactly(error.consumed)
+                except asyncio.IncompleteReadError:
+                    return None
+
+    async def client(self, reader, writer):
+        logger.debug('client connected')
+        loop = asyncio.get_running_loop()
+        try:
+            while (line := await self.read_line(reader)) != b'':
+                if line is None:
+                    error = ValueError(f'Request longer than {self.line_limit} bytes')
+                    response = json.dumps({'id': None, 'error': f'{type(error).__name__}: {error}'}) + '\n'
+                elif line.strip():
+                    response = await loop.run_in_executor(self.executor, self.handle_line, line)
+                else:
+                    continue
+                writer.write(response.encode())
+                await writer.drain()
+        except (ConnectionResetError, BrokenPipeError):
+            logger.debug('client disconnected mid-request')
+        finally:
+            writer.close()
+            logger.debug('client disconnected')
+
+    async def serve_socket(self, path):
+        """Serves the clients connecting to the Unix socket at path until cancelled
+
+        A stale socket left at path is replaced, any other file raises FileExistsError.
+        """
+        if os.path.lexists(path):
+            if not stat.S_ISSOCK(os.lstat(path).st_mode):
+                raise FileExistsError(f"{path} exists and is not a socket")
+            os.remove(path)
+        server = await asyncio.start_unix_server(self.client, path=path, limit=self.line_limit)
+        async with server:
+            await server.serve_forever()
+
+    def serve_stdio(self, stdin=sys.stdin, stdout=sys.stdout):
+        """Answers the requests read from stdin until it is closed"""
+        for line in stdin:
+            if line.strip():
+                stdout.write(self.handle_line(line))
+                stdout.flush()
+
+
+def query(path, requests):
+    """Sends requests to the server at the Unix socket path and returns the responses
+
+    The requests are written on a separate thread while the responses are read, so neither side blocks on a full
+    socket buffer however many requests are pipelined.
+    """
+    requests = list(requests)
+    failed = []
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(path)
+
+        def send():
+            try:
+                with client.makefile('w') as f:
+                    for request in requests:
+                        f.write(json.dumps(request) + '\n')
+            except OSError as error:
+                failed.append(error)
+
+        sender = threading.Thread(target=send, daemon=True)
+        sender.start()
+        with client.makefile('r') as f:
+            responses = []
+            for _ in requests:
+                line = f.readline()
+                if not line:
+                    break
+                responses.append(json.loads(line))
+        sender.join()
+
+    if failed:
+        raise failed[0]
+    if len(responses) < len(requests):
+        raise ConnectionError(f'Server closed the connection after {len(responses)} of {len(requests)} responses')
+    return responses
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    transport = parser.add_mutually_exclusive_group(required=True)
+    transport.add_argument('--socket', help='Unix socket path to listen on')
+    transport.add_argument('--stdio', action='store_true', help='Read requests from stdin, answer on stdout')
+    parser.add_argument('--preload', nargs='*', default=[], help='Aircraft data files built before serving')
+    args = parser.parse_args(argv)
+
+    server = Server()
+    for file_name in args.preload:
+        server.get_aircraft(file_name)
+
+    if args.stdio:
+        server.serve_stdio()
+    else:
+        try:
+            asyncio.run(server.serve_socket(args.socket))
+        except FileExistsError as error:
+            parser.error(str(error))
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
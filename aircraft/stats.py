@@ -0,0 +1,97 @@
+"""Streaming statistics that aggregate chunk by chunk in fixed memory"""
+import numpy as np
+
+
+class RunningMoments:
+
+    def __init__(self):
+        """Count, mean and variance updated per chunk (Chan et al. parallel update)"""
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, values):
+        values = np.ravel(values)
+        if len(values) == 0:
+            return
+        self._combine(len(values), values.mean(), ((values - values.mean()) ** 2).sum())
+
+    def merge(self, other):
+        if other.n:
+            self._combine(other.n, other.mean, other.m2)
+
+    def _combine(self, n, mean, m2):
+        total = self.n + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta ** 2 * self.n * n / total
+        self.n = total
+
+    @property
+    def variance(self):
+        return self.m2 / (self.n - 1) if self.n > 1 else np.nan
+
+    @property
+    def std(self):
+        return np.sqrt(self.variance)
+
+
+class StreamingHistogram:
+
+    def __init__(self, lo, hi, bins=1000):
+        """Fixed-bin histogram over [lo, hi) that also tracks the exact extremes and out-of-range counts"""
+        self.edges = np.linspace(lo, hi, bins + 1)
+        self.counts = np.zeros(bins, dtype=np.int64)
+        self.underflow = 0
+        self.overflow = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self.moments = RunningMoments()
+
+    @property
+    def n(self):
+        return self.moments.n
+
+    def update(self, values):
+        values = np.ravel(values)
+        if len(values) == 0:
+            return
+
+        lo, hi = self.edges[0], self.edges[-1]
+        index = np.floor((values - lo) / (hi - lo) * len(self.counts)).astype(np.int64)
+        inside = (index >= 0) & (index < len(self.counts))
+
+        self.counts += np.bincount(index[inside], minlength=len(self.counts))
+        self.underflow += int((index < 0).sum())
+        self.overflow += int((index >= len(self.counts)).sum())
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        self.moments.update(values)
+
+    def merge(self, other):
+        self.counts += other.counts
+        self.underflow += other.underflow
+        self.overflow += other.overflow
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.moments.merge(other.moments)
+
+    def quantile(self, q):
+        """Returns the q-quantiles, interpolated linearly inside a bin (resolution of one bin width)"""
+        q = np.asarray(q, dtype=float)
+        cumulative = np.concatenate([[self.underflow], self.underflow + np.cumsum(self.counts)])
+        positions = np.interp(q * self.n, cumulative, self.edges)
+        return np.clip(positions, self.min, self.max)
+
+    def summary(self, quantiles=(0.001, 0.01, 0.5, 0.99, 0.999)):
+        """Returns a dictionary with the count, extremes, moments and quantiles"""
+        summary = {
+            'n': self.n,
+            'min': float(self.min),
+            'max': float(self.max),
+            'mean': float(self.moments.mean),
+            'std': float(self.moments.std),
+        }
+        for q, value in zip(quantiles, self.quantile(quantiles)):
+            summary[f'q{q:g}'] = float(value)
+        return summary
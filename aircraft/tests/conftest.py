@@ -0,0 +1,5 @@
+"""Puts the package directory on sys.path: the modules import each other by their flat names"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
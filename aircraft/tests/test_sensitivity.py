@@ -0,0 +1,44 @@
+"""The vectorized Jacobian of sensitivity against scalar central differences, one design at a time"""
+import os
+
+import numpy as np
+import pytest
+
+from cg_calculation import CenterOfGravity
+from helpers import load_data
+from loading import Loading
+from sensitivity import OUTPUTS, jacobian
+from Stabcont import Stabcont
+
+DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'NewData.csv')
+PARAMETERS = ['XcgOEW', 'OEW', 'XLEMAC', 'mac', 'A', 'quart_sweep', 'l_h', 'S_h', 'z_h', 'b_f']
+MAC, CHANGE = 3.17, 0.6
+
+
+def scalar_outputs(data):
+    """Returns the OUTPUTS of a single design, with the loading c.g. limits of its own loading diagram"""
+    load = Loading(data=data, mac=MAC, change=CHANGE)
+    load.get_cg_shift(plot=False)
+    min_xcg, max_xcg = load.get_maxmincg()
+
+    ac = Stabcont(data=data)
+    return np.array([
+        CenterOfGravity(data=data).cg,
+        ac.getx_ac('cruise'),
+        ac.getdownwash(),
+        ac.required_tail(min_xcg, max_xcg)['sratio_req'],
+    ])
+
+
+def test_jacobian_matches_scalar_differences():
+    results = jacobian(DATA, PARAMETERS, mac=MAC, change=CHANGE)
+    base = load_data(DATA)
+
+    assert results['outputs'] == OUTPUTS
+    assert np.allclose([results['values'][output] for output in OUTPUTS], scalar_outputs(base), rtol=1e-12)
+
+    for j, name in enumerate(PARAMETERS):
+        h = 1e-6 * max(abs(base[name]), 1)
+        derivative = (scalar_outputs({**base, name: base[name] + h})
+                      - scalar_outputs({**base, name: base[name] - h})) / (2 * h)
+        assert results['jacobian'][:, j] == pytest.approx(derivative, rel=1e-6, abs=1e-9), name
@@ -0,0 +1,60 @@
+"""The pruned search of worstcase against a brute-force enumeration of every load of small aircraft"""
+import itertools
+import os
+
+import numpy as np
+import pytest
+
+from cabin import CabinLayout, Zone
+from fuel import FuelSystem, Tank
+from loading import Loading
+from worstcase import extremes, loading_groups
+
+DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data.csv')
+
+
+def brute_force(loading):
+    """Returns the most forward and most aft c.g. over every subset of items that respects the group requirements"""
+    groups = loading_groups(loading)
+    items = [(g, i) for g, group in enumerate(groups) for i in range(len(group['xcg']))]
+    sizes = [len(group['xcg']) for group in groups]
+    mass_oew = loading.data['OEW']
+
+    min_xcg = max_xcg = loading.xcg_oew
+    for selected in itertools.product([False, True], repeat=len(items)):
+        loads = [0] * len(groups)
+        mass, moment = mass_oew, mass_oew * loading.xcg_oew
+        for (g, i), chosen in zip(items, selected):
+            if chosen:
+                loads[g] += 1
+                mass += groups[g]['mass'][i]
+                moment += groups[g]['mass'][i] * groups[g]['xcg'][i]
+        if any(loads[g] and any(loads[r] != sizes[r] for r in group['requires']) for g, group in enumerate(groups)):
+            continue
+        min_xcg, max_xcg = min(min_xcg, moment / mass), max(max_xcg, moment / mass)
+    return min_xcg, max_xcg
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_extremes_match_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    cabin = CabinLayout([Zone('economy', rng.uniform(3, 10), 3, rng.uniform(0.5, 3), 'AB|C')])
+    fuel = FuelSystem([Tank('inner', rng.uniform(-0.5, 1), rng.uniform(500, 3000)),
+                       Tank('outer', rng.uniform(-0.5, 1), rng.uniform(500, 3000))])
+    loading = Loading(DATA, cabin=cabin, fuel=fuel)
+    loading.mass_average_pax = rng.uniform(50, 2000)  # Heavy passengers make the seat order matter
+
+    results = extremes(loading)
+    min_xcg, max_xcg = brute_force(loading)
+
+    assert results['min_xcg'] == pytest.approx(min_xcg, rel=1e-12)
+    assert results['max_xcg'] == pytest.approx(max_xcg, rel=1e-12)
+
+
+def test_extremes_contain_loading_diagram():
+    loading = Loading(DATA)
+    loading.get_cg_shift(plot=False)
+    results = extremes(loading)
+
+    assert results['min_xcg'] <= loading.xcg.min() + 1e-12
+    assert results['max_xcg'] >= loading.xcg.max() - 1e-12
@@ -0,0 +1,145 @@
+"""Uncertainty of the OEW c.g. and the tail requirement under uncertain model coefficients and inputs
+
+The uncertain parameters are sampled uniformly within their ranges, by Latin hypercube or by a randomly shifted
+Halton sequence, in chunks evaluated on a process pool. Every output is aggregated in a StreamingHistogram, so the
+memory does not depend on the number of samples.
+
+Parameter names are data keys (S_hld, CL_max), the Stabcont coefficients cm0 and cmacf, or 'factor:<name>' for the
+mass factors of CenterOfGravity.
+"""
+import numpy as np
+
+from cg_calculation import CenterOfGravity
+from helpers import load_data, parallel_map
+from sensitivity import evaluate
+from Stabcont import Stabcont
+from stats import StreamingHistogram
+
+METHODS = ['lhs', 'halton', 'random']
+OUTPUT_RANGES = {
+    'cg': (-0.5, 1.5),
+    'x_ac': (-0.5, 1.5),
+    'sratio_req': (-0.5, 1.5),
+    'min_xcg': (-0.5, 1.5),
+    'max_xcg': (-0.5, 1.5),
+}
+PRIMES = [2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43, 47, 53, 59, 61, 67, 71, 73, 79, 83, 89, 97]
+
+
+def default_ranges(file_name='data.csv', spread=0.1):
+    """Returns +-spread ranges around the nominal mass factors, S_hld, CL_max, cm0 and cmacf"""
+    data = load_data(file_name)
+    nominal = {f'factor:{name}': value for name, value in CenterOfGravity(file_name).factors.items()}
+    nominal.update({'S_hld': data['S_hld'], 'CL_max': data['CL_max'], 'cm0': Stabcont.cm0, 'cmacf': Stabcont.cmacf})
+    return {name: tuple(sorted([value * (1 - spread), value * (1 + spread)])) for name, value in nominal.items()}
+
+
+def halton(start, n, d):
+    """Returns the points start to start + n of the d-dimensional Halton sequence, shape (n, d)"""
+    if d > len(PRIMES):
+        raise ValueError(f"Halton sequence limited to {len(PRIMES)} dimensions")
+
+    points = np.zeros((n, d))
+    for j, base in enumerate(PRIMES[:d]):
+        index = np.arange(start + 1, start + n + 1)
+        scale = 1 / base
+        while index.any():
+            points[:, j] += scale * (index % base)
+            index //= base
+            scale /= base
+    return points
+
+
+def sample(method, start, n, d, seed):
+    """Returns n points of the unit hypercube of dimension d
+
+    args:
+        method (str): 'lhs' for a Latin hypercube of the n points, 'halton' for the points start to start + n of the
+            Halton sequence shifted by a random vector common to all the chunks, or 'random'
+        seed: seed of the chunk ('lhs', 'random') or of the whole run ('halton')
+    """
+    rng = np.random.default_rng(seed)
+    if method == 'lhs':
+        strata = rng.permuted(np.tile(np.arange(n), (d, 1)), axis=1).T
+        return (strata + rng.random((n, d))) / n
+    if method == 'halton':
+        return (halton(start, n, d) + rng.random(d)) % 1
+    if method == 'random':
+        return rng.random((n, d))
+    raise ValueError(f"Unknown sampling method '{method}', expected one of {METHODS}")
+
+
+def evaluate_chunk(base, ranges, method, start, n, seed, mac, change, bins):
+    """Evaluates n samples and returns the histograms of the outputs"""
+    names = list(ranges)
+    low, high = np.array([ranges[name] for name in names]).T
+    values = low + sample(method, start, n, len(names), seed) * (high - low)
+
+    data = {name: np.full(n, value) for name, value in base.items()}
+    factors = {}
+    for name, column in zip(names, values.T):
+        if name.startswith('factor:'):
+            factors[name[len('factor:'):]] = column
+        else:
+            data[name] = column
+
+    results = evaluate(data, mac=mac, change=change, factors=factors)
+
+    histograms = {}
+    for name, output_range in OUTPUT_RANGES.items():
+        histograms[name] = StreamingHistogram(*output_range, bins)
+        histograms[name].update(results[name])
+    return histograms
+
+
+def run(n_samples, file_name='data.csv', ranges=None, method='lhs', chunk_size=20_000, workers=None, seed=0, mac=1,
+        change=0, bins=2000):
+    """Returns streaming histograms of the OUTPUT_RANGES outputs over n_samples samples of the uncertain parameters
+
+    args:
+        n_samples (int): number of samples, at least 1
+        file_name (str): aircraft data with the nominal values
+        ranges (dict): parameter name -> (low, high), default_ranges(file_name) by default
+        method (str): sampling method, see sample
+        chunk_size (int): samples evaluated per task
+        workers (int): number of processes, None for one per core and 0 to run in this process
+        seed (int): seed of the random streams
+        mac, change: OEW c.g. shift, as in Loading
+        bins (int): histogram bins, the quantile resolution is 2 / bins
+    """
+    if n_samples < 1:
+        raise ValueError(f"n_samples must be at least 1, got {n_samples}")
+    base = load_data(file_name)
+    ranges = default_ranges(file_name) if ranges is None else ranges
+    seeds = np.random.SeedSequence(seed)
+
+    def tasks():
+        for start in range(0, n_samples, chunk_size):
+            chunk_seed = seed if method == 'halton' else seeds.spawn(1)[0]
+            yield base, ranges, method, start, min(chunk_size, n_samples - start), chunk_seed, mac, change, bins
+
+    totals = None
+    for histograms in parallel_map(evaluate_chunk, tasks(), workers=workers):
+        if totals is None:
+            totals = histograms
+        else:
+            for name, histogram in histograms.items():
+                totals[name].merge(histogram)
+
+    return totals
+
+
+def main():
+    results = run(10 ** 6, file_name='NewData.csv', mac=3.17, change=0.6)
+
+    print('-' * 80)
+    print(f"{'Uncertainty of the c.g. and the tail requirement':^80}")
+    print('-' * 80)
+    for name, histogram in results.items():
+        summary = histogram.summary()
+        print(f"{name:<12} {'mean':<5} {summary['mean']:<10.5f} {'std':<4} {summary['std']:<10.5f} "
+              f"{'q0.01':<6} {summary['q0.01']:<10.5f} {'q0.99':<6} {summary['q0.99']:<10.5f}")
+
+
+if __name__ == "__main__":
+    main()
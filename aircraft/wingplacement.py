@@ -0,0 +1,84 @@
+"""Wing placement: loading c.g. range and tail size over a sweep of wing positions (X_LEMAC)"""
+import numpy as np
+
+from cg_calculation import CenterOfGravity
+from loading import Loading, cumulative_cg
+from Stabcont import Stabcont
+
+
+def wing_sweep(x_lemac=None, file_name='data.csv', margin=0.02, sm=0.05, mac=1, change=0):
+    """Returns the loading c.g. limits and the required S_h/S for every wing position
+
+    Moving the wing by dx moves the wing group (wing, main gear and engines), the fuel and the mac with it, while the
+    fuselage, tails, passengers and cargo stay in place. The tail arm l_h shortens by dx and the wing root moves aft
+    from the nose, l_fn growing by dx. All positions are evaluated at once by broadcasting over the first axis.
+
+    args:
+        x_lemac (array): positions of the leading edge of the mac [m], by default XLEMAC +- 3 m in 601 steps
+        file_name (str): csv file with the aircraft data
+        margin (float): margin added on both sides of the c.g. range [x/mac]
+        sm (float): static margin of the stability line
+        mac, change (float): OEW c.g. shift as in Loading, the OEW c.g. moves forward by change/mac [x/mac]
+
+    returns:
+        dict: 'x_lemac', 'xcg_oew', 'min_xcg', 'max_xcg' and the entries of Stabcont.required_tail as arrays over the
+        positions, plus 'best' (index of the smallest S_h/S), 'x_lemac_opt' and 'sratio_opt'
+    """
+    cg = CenterOfGravity(file_name)
+    load = Loading(file_name, mac=mac, change=change)
+    XLEMAC = cg.data['XLEMAC']
+    mac_wing = cg.data['mac']
+
+    if x_lemac is None:
+        x_lemac = XLEMAC + np.linspace(-3, 3, 601)
+    x_lemac = np.atleast_1d(np.asarray(x_lemac, dtype=float))
+    shift = x_lemac - XLEMAC
+
+    # OEW c.g.: only the wing group moves with the wing
+    mass_total = sum(cg.mass.values())
+    moment = sum(cg.mass[group] * cg.cgs[group] for group in cg.mass)
+    x_oew = (moment + cg.mass['wing'] * shift) / mass_total
+    xcg_oew = (x_oew - x_lemac) / mac_wing - change / mac
+
+    # Loading diagram: items in the fuselage move forward relative to a wing that moves aft
+    xcg_items, mass_items, in_fuselage = load.loading_orders()
+    xcg_items = xcg_items - np.where(in_fuselage, shift[:, np.newaxis, np.newaxis] / mac_wing, 0)
+    xcg, _ = cumulative_cg(xcg_oew[:, np.newaxis], load.data['OEW'], xcg_items, mass_items)
+
+    min_xcg = xcg.min(axis=(1, 2)) - margin
+    max_xcg = xcg.max(axis=(1, 2)) + margin
+
+    # Scissor plot with the tail arm and wing root position of every position
+    data = Stabcont(file_name).data
+    data['l_h'] = data['l_h'] - shift
+    data['l_fn'] = data['l_fn'] + shift
+    tail = Stabcont(file_name, data=data).required_tail(min_xcg, max_xcg, sm)
+
+    best = int(np.argmin(tail['sratio_req']))
+    return {
+        'x_lemac': x_lemac,
+        'xcg_oew': xcg_oew,
+        'min_xcg': min_xcg,
+        'max_xcg': max_xcg,
+        **tail,
+        'best': best,
+        'x_lemac_opt': x_lemac[best],
+        'sratio_opt': tail['sratio_req'][best],
+    }
+
+
+def main():
+    results = wing_sweep(file_name='NewData.csv')
+    best = results['best']
+
+    print('-' * 60)
+    print(f"{'Wing placement':^60}")
+    print('-' * 60)
+    print(f"{'Optimum X_LEMAC':<30} {results['x_lemac_opt']:<20.3f} {'[m]':<7}")
+    print(f"{'Required S_h/S':<30} {results['sratio_opt']:<20.5f} {'[-]':<7}")
+    print(f"{'Forward c.g.':<30} {results['min_xcg'][best]:<20.5f} {'[-]':<7}")
+    print(f"{'Aft c.g.':<30} {results['max_xcg'][best]:<20.5f} {'[-]':<7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""Exact most forward and most aft c.g. over all loading orders and partial loads
+
+Every prefix of a loading order is itself a partial load, so the extremes over all orders are the extremes over all
+loads that can be reached. The items are grouped: the two cargo holds, the seats of each kind in boarding order (the
+aisle seats are only sold once every window seat is, and so on) and the fuel tanks in filling order. A group may only
+be loaded once the groups it requires are full.
+
+Adding an item moves the c.g. towards its arm, so for the most forward c.g. an available item belongs to the optimum
+exactly when its arm is ahead of the optimum c.g., unless a later group needs it. The load of each group is then a
+prefix of its items sorted by arm, and the search branches on the prefix length of each group in turn. A node is
+pruned when the relaxation that drops the group requirements and adds the remaining items in order of arm cannot
+beat the best load found so far. Partial cargo and fuel loads need no extra branches: the c.g. is monotonic in the
+mass of a single item, so the extremes are at an empty or full hold or tank.
+
+    python worstcase.py --data NewData.csv --mac 3.17 --change 0.6
+"""
+import argparse
+
+import numpy as np
+
+from loading import Loading
+
+
+def loading_groups(loading):
+    """Returns the item groups of a Loading as a list of dicts with 'name', 'labels', 'xcg', 'mass' and 'requires'
+
+    Groups only require groups listed before them.
+    """
+    xcg_cargo, mass_cargo = loading.cargo_arms()
+    groups = [
+        {'name': 'front cargo', 'labels': ['front'], 'xcg': xcg_cargo[:1], 'mass': mass_cargo[:1], 'requires': []},
+        {'name': 'aft cargo', 'labels': ['aft'], 'xcg': xcg_cargo[1:], 'mass': mass_cargo[1:], 'requires': []},
+    ]
+
+    cabin = loading.get_cabin()
+    xcg_seats = cabin.seat_arms(loading.data)
+    for kind in loading.boarding:
+        seats = cabin.order([kind])[0]
+        requires = [len(groups) - 1] if kind != loading.boarding[0] else []
+        groups.append({'name': kind, 'labels': cabin.label[seats].tolist(), 'xcg': xcg_seats[seats],
+                       'mass': np.full(len(seats), float(loading.mass_average_pax)), 'requires': requires})
+
+    system = loading.get_fuel_system()
+    xcg_fuel, mass_fuel = system.fueling_order()
+    for i, name in enumerate(system.names[::-1]):
+        requires = [len(groups) - 1] if i else []
+        groups.append({'name': 'fuel', 'labels': [name], 'xcg': xcg_fuel[i:i + 1], 'mass': mass_fuel[i:i + 1],
+                       'requires': requires})
+
+    return groups
+
+
+def most_forward(groups, xcg_start, mass_start):
+    """Returns the most forward c.g. reachable from (xcg_start, mass_start) by loading the groups
+
+    returns:
+        dict: 'xcg' and 'mass' of the extreme load, its 'order' as (group name, item label) pairs and the number of
+        search 'nodes'
+    """
+    # Items of every group sorted by arm, with the prefix sums of mass and moment
+    items = []
+    for group in groups:
+        order = np.argsort(group['xcg'], kind='stable')
+        mass = np.asarray(group['mass'], dtype=float)[order]
+        xcg = np.asarray(group['xcg'], dtype=float)[order]
+        items.append({
+            'order': order,
+            'mass': np.concatenate([[0], np.cumsum(mass)]),
+            'moment': np.concatenate([[0], np.cumsum(mass * xcg)]),
+        })
+    sizes = [len(group['xcg']) for group in groups]
+
+    # All items sorted by arm once, for the relaxation
+    group_of = np.concatenate([np.full(size, i) for i, size in enumerate(sizes)])
+    all_xcg = np.concatenate([np.asarray(group['xcg'], dtype=float) for group in groups])
+    all_mass = np.concatenate([np.asarray(group['mass'], dtype=float) for group in groups])
+    by_arm = np.argsort(all_xcg, kind='stable')
+    group_of, all_xcg, all_mass = group_of[by_arm], all_xcg[by_arm], all_mass[by_arm]
+
+    def bound(mass, moment, loads, next_group):
+        """Lowest c.g. reachable when the remaining groups may be loaded item by item in any order"""
+        available = np.zeros(len(groups), dtype=bool)
+        for g in range(next_group, len(groups)):
+            available[g] = all(loads[r] == sizes[r] if r < next_group else available[r]
+                               for r in groups[g]['requires'])
+        mask = available[group_of]
+        if not mask.any():
+            return moment / mass
+        m = mass + np.cumsum(all_mass[mask])
+        q = moment + np.cumsum(all_mass[mask] * all_xcg[mask])
+        return min(moment / mass, (q / m).min())
+
+    best = {'xcg': float(xcg_start), 'mass': float(mass_start), 'loads': [0] * len(groups)}
+    nodes = 0
+
+    stack = [(0, float(mass_start), float(mass_start * xcg_start), [])]
+    while stack:
+        g, mass, moment, loads = stack.pop()
+        nodes += 1
+
+        if moment / mass < best['xcg']:
+            best = {'xcg': moment / mass, 'mass': mass, 'loads': loads + [0] * (len(groups) - len(loads))}
+        if g == len(groups):
+            continue
+
+        group = items[g]
+        allowed = all(loads[r] == sizes[r] for r in groups[g]['requires'])
+        children = []
+        for k in range(sizes[g] + 1 if allowed else 1):
+            child = (g + 1, mass + group['mass'][k], moment + group['moment'][k], loads + [k])
+            bound_xcg = bound(child[1], child[2], child[3], g + 1)
+            if bound_xcg < best['xcg']:
+                children.append((bound_xcg, child))
+
+        # Most promising child searched first
+        stack.extend(child for _, child in sorted(children, key=lambda c: -c[0]))
+
+    order = [(group['name'], group['labels'][i])
+             for group, item, k in zip(groups, items, best['loads']) for i in item['order'][:k]]
+    return {'xcg': best['xcg'], 'mass': best['mass'], 'order': order, 'nodes': nodes}
+
+
+def extremes(loading):
+    """Returns the most forward and most aft c.g. of a Loading over all loading orders and partial loads
+
+    returns:
+        dict: 'min_xcg' and 'max_xcg', and the 'forward' and 'aft' results of most_forward
+    """
+    groups = loading_groups(loading)
+    forward = most_forward(groups, loading.xcg_oew, loading.data['OEW'])
+
+    # The most aft c.g. is the most forward one with the arms mirrored
+    mirrored = [{**group, 'xcg': -np.asarray(group['xcg'])} for group in groups]
+    aft = most_forward(mirrored, -loading.xcg_oew, loading.data['OEW'])
+    aft['xcg'] = -aft['xcg']
+
+    return {'min_xcg': forward['xcg'], 'max_xcg': aft['xcg'], 'forward': forward, 'aft': aft}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data', default='data.csv', help='Aircraft data file')
+    parser.add_argument('--mac', type=float, default=1, help='mac passed to Loading')
+    parser.add_argument('--change', type=float, default=0, help='OEW c.g. shift passed to Loading')
+    args = parser.parse_args(argv)
+
+    loading = Loading(args.data, mac=args.mac, change=args.change)
+    loading.loading_diagram()
+    results = extremes(loading)
+
+    print(f"{'Loading diagram':<18} {loading.xcg.min():<10.5f} {loading.xcg.max():<10.5f}")
+    print(f"{'All orders':<18} {results['min_xcg']:<10.5f} {results['max_xcg']:<10.5f}")
+    for name in ['forward', 'aft']:
+        result = results[name]
+        groups = {}
+        for group, label in result['order']:
+            groups.setdefault(group, []).append(label)
+        print(f"\nMost {name} c.g. {result['xcg']:.5f} at {result['mass']:.0f} kg ({result['nodes']} nodes)")
+        for group, labels in groups.items():
+            print(f"    {group:<12} {' '.join(labels)}")
+
+
+if __name__ == "__main__":
+    main()